@@ -0,0 +1,904 @@
+import argparse
+import os
+import random
+import shutil
+import statistics
+import struct
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from frame_parser import FRAME_LENGTH, RS422_FRAME_LENGTH, FrameParser, calculate_crc16, calculate_crc16_table, crc_hqx, destuff_frame, stuff_frame
+
+BAUD_RATES = [9600, 19200, 38400, 115200, 230400, 460800]
+
+
+def make_frame(crc_func, frame_type=0xFF, rng=random, length=FRAME_LENGTH):
+    frame = bytearray(rng.randbytes(length))
+    frame[0] = 0xCA
+    frame[2] = frame_type
+    frame[-1] = 0xEF
+    crc = crc_func(frame[2:-4])
+    frame[-4] = crc >> 8
+    frame[-3] = crc & 0xFF
+    return frame
+
+
+def make_telemetry_frame(rng=random, fix=0):
+    # Telemetry frame (byte 2 = 0xFF) with a plausible GPS fix so the map path runs
+    frame = bytearray(rng.randbytes(FRAME_LENGTH))
+    frame[0] = 0xCA
+    frame[2] = 0xFF
+    frame[137:141] = bytes([10, 30, fix % 60, 0])
+    frame[141:149] = struct.pack('d', 1045.1234 + fix * 0.001)
+    frame[149] = ord('N')
+    frame[150:158] = struct.pack('d', 10640.5678 + fix * 0.001)
+    frame[158] = ord('E')
+    frame[-1] = 0xEF
+    crc = calculate_crc16(frame[2:-4])
+    frame[-4] = crc >> 8
+    frame[-3] = crc & 0xFF
+    return frame
+
+
+def calculate_crc_bitwise(data):
+    # Original bit-by-bit SerialThread.calculate_crc, kept as the reference
+    crc = 0x0000
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = (crc << 1) ^ 0x1021
+            else:
+                crc <<= 1
+    return crc & 0xFFFF
+
+
+def destuff_frame_bytewise(frame_data):
+    # Original byte-by-byte SerialThread.destuff_frame, kept as the reference
+    destuffed_data = bytearray()
+    escape_received = False
+    for byte in frame_data:
+        if escape_received:
+            if byte == 0xDC:
+                destuffed_data.append(0xCA)
+            elif byte == 0xDE:
+                destuffed_data.append(0xEF)
+            elif byte == 0xDB:
+                destuffed_data.append(0xBD)
+            escape_received = False
+        elif byte == 0xBD:
+            escape_received = True
+        else:
+            destuffed_data.append(byte)
+    return destuffed_data
+
+
+def time_per_call(func, inputs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            func(item)
+    return (time.perf_counter() - start) / (repeat * len(inputs))
+
+
+def bench_read(args):
+    from PyQt6.QtCore import QCoreApplication, Qt
+    from capture import CaptureWriter
+    from qt_app import SerialThread
+
+    app = QCoreApplication(sys.argv)
+    tmp = tempfile.mkdtemp()  # --capture files
+    rng = random.Random(0)
+    frames = [make_frame(calculate_crc16, rng=rng) for _ in range(64)]
+    if args.rs422:
+        stream = b''.join(bytes(frame[1:-1]) for frame in frames)
+    else:
+        stream = b''.join(stuff_frame(frame) for frame in frames)
+    frame_bytes = len(stream) / len(frames)
+
+    print(f"{'baud':>8} {'chunk':>6} {'frames/s':>10} {'max/s':>8} {'cpu us/frame':>13} {'signals/s':>10}")
+    for baud in args.baud or BAUD_RATES:
+        for chunk_size in args.chunk_size:
+            capture = None
+            if args.capture:
+                capture = CaptureWriter(os.path.join(tmp, f"capture_{baud}_{chunk_size}"), max_files=1)
+                capture.start()
+            thread = SerialThread("loop://", baud, read_chunk_size=chunk_size, batch_interval=args.batch_interval, capture=capture)
+            thread.set_mode(not args.rs422)
+            received = [0]
+            signals = [0]
+
+            def count(frame_count, data, status):
+                received[0] += 1
+                signals[0] += 1
+
+            def count_batch(frames, counters):
+                received[0] += len(frames)
+                signals[0] += 1
+
+            thread.data_received.connect(count, Qt.ConnectionType.DirectConnection)
+            thread.frames_received.connect(count_batch, Qt.ConnectionType.DirectConnection)
+            thread.start()
+            while thread.serial_port is None or not thread.running:
+                time.sleep(0.01)
+
+            # Pace the writer at the line rate (10 bits per byte)
+            bytes_per_tick = max(1, int(baud / 10 * 0.01))
+            offset = 0
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            next_tick = start
+            while time.perf_counter() - start < args.duration:
+                block = stream[offset:offset + bytes_per_tick]
+                if len(block) < bytes_per_tick:
+                    offset = bytes_per_tick - len(block)
+                    block += stream[:offset]
+                else:
+                    offset += bytes_per_tick
+                thread.serial_port.write(block)
+                next_tick += 0.01
+                time.sleep(max(0.0, next_tick - time.perf_counter()))
+            while thread.serial_port.in_waiting:
+                time.sleep(0.01)
+            elapsed = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+
+            thread.running = False
+            thread.serial_port.write(b'\x00')
+            thread.wait()
+            if capture is not None:
+                capture.close()
+
+            frames_per_s = received[0] / elapsed
+            max_per_s = baud / 10 / frame_bytes
+            cpu_per_frame = cpu / received[0] * 1e6 if received[0] else float('nan')
+            print(f"{baud:>8} {chunk_size:>6} {frames_per_s:>10.1f} {max_per_s:>8.1f} {cpu_per_frame:>13.1f} {signals[0] / elapsed:>10.1f}")
+    shutil.rmtree(tmp)
+    del app
+
+
+def bench_crc(args):
+    rng = random.Random(args.seed)
+    payloads = [rng.randbytes(278) for _ in range(args.frames)]
+    payloads += [rng.randbytes(rng.randrange(0, 1000)) for _ in range(args.frames)]
+    for payload in payloads:
+        expected = calculate_crc_bitwise(payload)
+        if calculate_crc16_table(payload) != expected or calculate_crc16(payload) != expected:
+            sys.exit(f"CRC mismatch against the bitwise reference for {payload.hex()}")
+    print(f"{len(payloads)} random payloads match the bitwise reference")
+
+    frames = payloads[:args.frames]
+    implementations = [("bitwise", calculate_crc_bitwise), ("table", calculate_crc16_table)]
+    if crc_hqx is not None:
+        implementations.append(("crc_hqx", calculate_crc16))
+    baseline = None
+    for name, func in implementations:
+        per_frame = time_per_call(func, frames, args.repeat)
+        baseline = baseline or per_frame
+        print(f"{name:>8}: {per_frame * 1e6:8.2f} us/frame ({baseline / per_frame:6.1f}x)")
+
+
+def bench_destuff(args):
+    # Fuzz over an alphabet dense in escape bytes so every edge case shows up
+    rng = random.Random(args.seed)
+    alphabet = [0xBD, 0xBD, 0xDC, 0xDE, 0xDB, 0xCA, 0xEF, 0x00]
+    for _ in range(args.fuzz):
+        data = bytes(rng.choice(alphabet) for _ in range(rng.randrange(0, 48)))
+        if destuff_frame(data) != destuff_frame_bytewise(data):
+            sys.exit(f"destuff_frame differs from the bytewise reference for {data.hex()}")
+    print(f"{args.fuzz} fuzzed inputs match the bytewise reference")
+
+    frames = [
+        ("typical", stuff_frame(make_frame(calculate_crc16, rng=rng))),
+        ("all escaped", b'\xCA' + b'\xBD\xDB' * 282 + b'\xEF'),
+        ("mixed escaped", b'\xCA' + b'\xBD\xDC\xBD\xDE\xBD\xDB' * 94 + b'\xEF'),
+    ]
+    for name, frame in frames:
+        if destuff_frame(frame) != destuff_frame_bytewise(frame):
+            sys.exit(f"destuff_frame differs from the bytewise reference for the {name} frame")
+        before = time_per_call(destuff_frame_bytewise, [frame], args.repeat)
+        after = time_per_call(destuff_frame, [frame], args.repeat)
+        print(f"{name:>14}: {before * 1e6:8.2f} -> {after * 1e6:8.2f} us/frame ({before / after:5.1f}x)")
+
+
+def bench_parse(args):
+    from capture import MAGIC as CAPTURE_MAGIC, read_capture
+
+    chunks = None
+    if args.file:
+        with open(args.file, "rb") as f:
+            stream = f.read()
+        if stream.startswith(CAPTURE_MAGIC):
+            # Feed the chunks exactly as the port returned them
+            chunks = [record.data for record in read_capture(args.file)]
+            stream = b''.join(chunks)
+    else:
+        rng = random.Random(args.seed)
+        length = args.frame_size + 2 if args.rs422 else FRAME_LENGTH
+        frames = [make_frame(calculate_crc16, rng=rng, length=length) for _ in range(args.frames)]
+        if args.rs422:
+            stream = b''.join(bytes(frame[1:-1]) for frame in frames)
+        else:
+            stream = b''.join(stuff_frame(frame) for frame in frames)
+
+    if chunks is None:
+        chunks = [stream[offset:offset + args.chunk_size] for offset in range(0, len(stream), args.chunk_size)]
+    parser = FrameParser(is_rf_mode=not args.rs422, rs422_frame_size=args.frame_size)
+    statuses = Counter()
+    start = time.perf_counter()
+    for chunk in chunks:
+        for frame in parser.feed(chunk):
+            statuses[frame.status] += 1
+    elapsed = time.perf_counter() - start
+
+    total = sum(statuses.values())
+    print(f"{len(stream)} bytes, {total} frames {dict(statuses)} in {elapsed:.3f} s")
+    print(f"{total / elapsed:.0f} frames/s, {len(stream) / elapsed / 1e6:.2f} MB/s, {elapsed / max(total, 1) * 1e6:.2f} us/frame")
+
+
+def bench_resync(args):
+    rng = random.Random(args.seed)
+    stream = bytearray()
+    drops = 0
+    for _ in range(args.frames):
+        frame = bytearray(make_frame(calculate_crc16, rng=rng)[1:-1])
+        if rng.random() < args.drop_rate:
+            del frame[rng.randrange(len(frame))]
+            drops += 1
+        stream += frame
+    stream = bytes(stream)
+    print(f"{args.frames} RS422 frames, {drops} with a dropped byte")
+
+    for resync in (False, True):
+        parser = FrameParser(is_rf_mode=False, resync=resync)
+        statuses = Counter()
+        start = time.perf_counter()
+        for offset in range(0, len(stream), args.chunk_size):
+            for frame in parser.feed(stream[offset:offset + args.chunk_size]):
+                statuses[frame.status] += 1
+        elapsed = time.perf_counter() - start
+        print(f"resync={'on' if resync else 'off':>3}: {statuses['ok']:>6} ok ({statuses['ok'] / args.frames:6.1%}), "
+              f"{statuses['crc_fail']:>6} crc_fail, {parser.discarded_bytes:>7} bytes skipped, "
+              f"{len(stream) / elapsed / 1e6:6.2f} MB/s")
+
+
+def bench_gui(args):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    import qt_app
+
+    app = QApplication(sys.argv)
+    qt_app.app = app
+    rng = random.Random(args.seed)
+    frames = [make_telemetry_frame(rng, fix=i) for i in range(args.frames)]
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # map.html and friends land here
+        try:
+            window = qt_app.MainWindow()
+            window.render_interval = args.render_interval
+            window.show()
+            app.processEvents()
+            times = []
+            for frame in frames:
+                start = time.perf_counter()
+                window.handle_data_received(len(frame), frame, "ok")
+                app.processEvents()
+                times.append(time.perf_counter() - start)
+            # Burst: everything arrives at once, the render tick shows only the latest frame
+            start = time.perf_counter()
+            for frame in frames:
+                window.handle_data_received(len(frame), frame, "ok")
+            window.render_tick()
+            app.processEvents()
+            burst = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+
+    times = times[1:]  # the first frame builds the parameter grid
+    times.sort()
+    print(f"{len(times)} telemetry frames through MainWindow.handle_data_received")
+    print(f"mean {statistics.mean(times) * 1e3:.2f} ms, median {statistics.median(times) * 1e3:.2f} ms, "
+          f"p99 {times[int(len(times) * 0.99)] * 1e3:.2f} ms per frame (render_interval={args.render_interval} ms)")
+    print(f"burst of {len(frames)} frames plus one render tick: {burst * 1e3:.2f} ms")
+
+
+def bench_decode(args):
+    from telemetry import decode_gps, decode_telemetry
+
+    rng = random.Random(args.seed)
+    frames = [make_telemetry_frame(rng, fix=i) for i in range(args.frames)]
+    per_frame = time_per_call(decode_telemetry, frames, args.repeat)
+    print(f"decode_telemetry: {per_frame * 1e6:.2f} us/frame ({len(decode_telemetry(frames[0]))} fields)")
+    per_frame = time_per_call(decode_gps, frames, args.repeat)
+    print(f"decode_gps:       {per_frame * 1e6:.2f} us/frame")
+
+
+def bench_batch(args):
+    import numpy as np
+    from telemetry_batch import decode_batch
+
+    rng = np.random.default_rng(args.seed)
+    frames = rng.integers(0, 256, size=(args.frames, FRAME_LENGTH), dtype=np.uint8)
+    frames[:, 2] = 0xFF
+    start = time.perf_counter()
+    columns = decode_batch(frames)
+    elapsed = time.perf_counter() - start
+    print(f"decode_batch: {args.frames} frames, {len(columns)} columns in {elapsed:.2f} s "
+          f"({args.frames / elapsed / 1e6:.2f} M frames/s, {elapsed / args.frames * 1e9:.0f} ns/frame)")
+
+    # Same values as the per-frame decoders, including frames without a GPS fix
+    check = frames[:args.check].copy()
+    coordinates = [(float("nan"), 1045.0), (1045.0, float("inf")), (float("-inf"), float("nan")), (1045.0, 10640.0)]
+    for row in range(0, len(check), 2):
+        latitude, longitude = coordinates[row // 2 % len(coordinates)]
+        check[row, 141:149] = np.frombuffer(struct.pack("<d", latitude), dtype=np.uint8)
+        check[row, 150:158] = np.frombuffer(struct.pack("<d", longitude), dtype=np.uint8)
+    mismatches = check_batch(check, decode_batch(check))
+    if mismatches:
+        sys.exit(f"decode_batch differs from decode_telemetry/decode_gps in {mismatches} of {len(check)} frames")
+    print(f"{len(check)} frames match decode_telemetry/decode_gps")
+
+
+def check_batch(frames, columns):
+    import numpy as np
+    from telemetry import decode_gps, decode_telemetry
+
+    mismatches = 0
+    for row, frame in enumerate(frames):
+        frame = frame.tobytes()
+        expected = decode_telemetry(frame)
+        gps = decode_gps(frame)
+        expected["Latitude"], expected["Longitude"] = gps[1:] if gps else (None, None)
+        for name, value in expected.items():
+            column = columns[name]
+            actual = None if np.ma.getmaskarray(column)[row] else column.data[row]
+            if actual != value:
+                mismatches += 1
+                break
+    return mismatches
+
+
+def bench_log(args):
+    from binlog import BinaryLogWriter, convert_to_text, format_frame_text
+
+    rng = random.Random(args.seed)
+    frames = [make_telemetry_frame(rng, fix=i) for i in range(args.frames)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.txt")
+        start = time.perf_counter()
+        with open(path, "w") as f:
+            for frame in frames:
+                f.write(format_frame_text(frame, "ok", time.strftime("%H:%M:%S")))
+        elapsed = time.perf_counter() - start
+        text_size = os.path.getsize(path)
+        print(f"{'text':>13}: {text_size / len(frames):7.0f} bytes/frame, {elapsed / len(frames) * 1e6:6.1f} us/frame")
+
+        for compress in (False, True):
+            path = os.path.join(tmp, f"log_{compress}.bin")
+            start = time.perf_counter()
+            log = BinaryLogWriter(path, compress=compress)
+            for frame in frames:
+                log.write_frame(frame, "ok")
+            log.close()
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(path)
+            name = "binary (zlib)" if compress else "binary"
+            print(f"{name:>13}: {size / len(frames):7.0f} bytes/frame, {elapsed / len(frames) * 1e6:6.1f} us/frame, "
+                  f"{text_size / size:4.1f}x smaller than text")
+
+            with open(os.path.join(tmp, "converted.txt"), "w") as out:
+                converted = convert_to_text(path, out)
+            if converted != len(frames):
+                sys.exit(f"convert_to_text read {converted} of {len(frames)} frames back from the {name} log")
+
+
+def bench_image(args):
+    from image_assembler import IMAGE_CHUNKS, ImageAssembler
+    from log_writer import LogWriter
+
+    rng = random.Random(args.seed)
+    images = [[make_frame(calculate_crc16, frame_type=i, rng=rng) for i in range(IMAGE_CHUNKS)] for _ in range(args.images)]
+    # The same chunk stream for both, with a few chunks lost and neighbours swapped
+    stream = []
+    for frames in images:
+        order = list(range(IMAGE_CHUNKS))
+        for i in range(1, IMAGE_CHUNKS - 1):
+            if rng.random() < args.reorder:
+                order[i], order[i + 1] = order[i + 1], order[i]
+        stream += [frames[i] for i in order if rng.random() >= args.loss]
+
+    def intact(tmp, path, frames):
+        with open(os.path.join(tmp, path), "rb") as f:
+            return f.read() == b"".join(bytes(frame[3:-3]) for frame in frames)
+
+    print(f"{'':>10} {'us/chunk':>9} {'queue items':>11} {'images':>7} {'intact':>7} {'flagged':>8}")
+    for name in ("per chunk", "assembler"):
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = LogWriter()
+            writer.start()
+            paths = []
+            start = time.perf_counter()
+            if name == "per chunk":
+                # The old handle_data_received: open on 0x00, write and flush every chunk, close on 0x1A or 27 chunks
+                image_file = None
+                for frame in stream:
+                    if image_file is None or frame[2] == 0x00:
+                        paths.append(f"{len(paths)}_img.txt")
+                        image_file = writer.open(os.path.join(tmp, paths[-1]), "wb")
+                        counter = 0
+                    image_file.write(bytes(frame[3:-3]))
+                    image_file.flush()
+                    counter += 1
+                    if frame[2] == 0x1A or counter == 27:
+                        image_file.close()
+                        image_file = None
+                flagged = 0
+            else:
+                assembler = ImageAssembler(lambda path, data: writer.write_file(os.path.join(tmp, path), data))
+                reports = []
+                for frame in stream:
+                    reports += assembler.add(frame, "ok")
+                reports += assembler.flush()
+                paths = [report.path for report in reports]
+                flagged = sum(bool(report.missing) for report in reports)
+            elapsed = time.perf_counter() - start
+            writer.stop()
+            items = writer.stats()["written_items"]
+            good = sum(intact(tmp, path, frames) for path, frames in zip(paths, images))
+            print(f"{name:>10} {elapsed / len(stream) * 1e6:>9.1f} {items:>11} {len(paths):>7} {good:>7} {flagged:>8}")
+
+def bench_session(args):
+    from binlog import BinaryLogWriter, read_binary_log
+    from session import Session, SessionWriter
+
+    rng = random.Random(args.seed)
+    templates = [make_telemetry_frame(rng, fix=i) for i in range(64)]
+    start_time = time.time() - args.frames / 12
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "session")
+        writer = SessionWriter(base)
+        log = BinaryLogWriter(os.path.join(tmp, "log.bin"))
+        for i in range(args.frames):
+            status = "crc_fail" if rng.random() < 0.001 else "ok"
+            timestamp = start_time + i / 12  # one frame every 83 ms
+            writer.write_frame(templates[i % len(templates)], status, timestamp)
+            log.write_frame(templates[i % len(templates)], status, timestamp)
+        writer.close()
+        log.close()
+        target = start_time + args.frames / 24
+
+        start = time.perf_counter()
+        with Session(base) as session:
+            opened = time.perf_counter() - start
+            lookups = [rng.randrange(len(session)) for _ in range(args.lookups)]
+            start = time.perf_counter()
+            for i in lookups:
+                frame = session.frame(i)
+                frame[2]
+                frame.release()
+            per_frame = (time.perf_counter() - start) / len(lookups)
+            start = time.perf_counter()
+            found = session.index_at(target)
+            seek = time.perf_counter() - start
+            start = time.perf_counter()
+            failed = session.find(status="crc_fail")
+            scan = time.perf_counter() - start
+        print(f"session: {args.frames} frames ({args.frames / 12 / 3600:.1f} h at 12 fps), open {opened * 1e3:.2f} ms")
+        print(f"  frame(i):       {per_frame * 1e6:8.2f} us")
+        print(f"  index_at(time): {seek * 1e6:8.2f} us -> frame {found}")
+        print(f"  find(crc_fail): {scan * 1e3:8.2f} ms -> {len(failed)} frames")
+
+        start = time.perf_counter()
+        for i, record in enumerate(read_binary_log(os.path.join(tmp, "log.bin"))):
+            if record.timestamp >= target:
+                break
+        print(f"  binlog linear scan to the same time: {(time.perf_counter() - start) * 1e3:.2f} ms -> frame {i}")
+
+
+def bench_replay(args):
+    from binlog import BinaryLogWriter
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if path is None:
+            rng = random.Random(args.seed)
+            templates = [make_telemetry_frame(rng, fix=i) for i in range(64)]
+            path = os.path.join(tmp, "replay.bin")
+            log = BinaryLogWriter(path)
+            for i in range(args.frames):
+                log.write_frame(templates[i % len(templates)], "ok", i / 12)
+            log.close()
+        url = "replay://" + path
+
+        if args.gui:
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+            from PyQt6.QtWidgets import QApplication
+            import qt_app
+
+            app = QApplication(sys.argv)
+            qt_app.app = app
+            cwd = os.getcwd()
+            os.chdir(tmp)  # logs, session and map.html land here
+            try:
+                window = qt_app.MainWindow()
+                window.com_port_combo.addItem(url)
+                window.com_port_combo.setCurrentIndex(window.com_port_combo.count() - 1)
+                window.replay_speed_combo.setCurrentText(f"{args.speed:g}x" if args.speed else "Max")
+                start = time.perf_counter()
+                cpu_start = time.process_time()
+                window.start_collection()
+                while window.serial_thread is not None:
+                    app.processEvents()
+                    time.sleep(0.001)
+                elapsed = time.perf_counter() - start
+                cpu = time.process_time() - cpu_start
+                received = window.total_frames
+                window.close()
+            finally:
+                os.chdir(cwd)
+        else:
+            from PyQt6.QtCore import QCoreApplication, Qt
+            from qt_app import SerialThread
+
+            app = QCoreApplication(sys.argv)
+            thread = SerialThread(url, 115200, batch_interval=args.batch_interval, replay_speed=args.speed)
+            thread.set_mode(not args.rs422)
+            received = [0]
+
+            def count(frame_count, data, status):
+                received[0] += 1
+
+            def count_batch(frames, counters):
+                received[0] += len(frames)
+
+            thread.data_received.connect(count, Qt.ConnectionType.DirectConnection)
+            thread.frames_received.connect(count_batch, Qt.ConnectionType.DirectConnection)
+            start = time.perf_counter()
+            cpu_start = time.process_time()
+            thread.start()
+            thread.wait()
+            elapsed = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            received = received[0]
+        del app
+
+    pipeline = "MainWindow" if args.gui else "SerialThread"
+    speed = f"{args.speed:g}x" if args.speed else "as fast as possible"
+    print(f"replay through {pipeline} ({speed}): {received} frames in {elapsed:.2f} s, "
+          f"{received / elapsed:.0f} frames/s, {cpu / max(received, 1) * 1e6:.1f} us CPU/frame")
+
+
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+window_shown = imported
+if {gui}:
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    {module}.app = app
+    window = {module}.MainWindow()
+    window.show()
+    app.processEvents()
+    window_shown = time.perf_counter()
+    window.close()
+print(json.dumps({{"import": imported - start, "window": window_shown - imported,
+                  "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+def bench_startup(args):
+    import json
+    import subprocess
+
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    here = os.path.dirname(os.path.abspath(__file__))
+    failed = False
+    for module, gui in (("qt_app", True), ("collector", False)):
+        runs = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for _ in range(args.runs):
+                script = STARTUP_SCRIPT.format(module=module, gui=gui)
+                # Fresh interpreter every run, cwd keeps the logs out of the tree
+                output = subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {here!r})\n" + script],
+                                        cwd=tmp, env=env, capture_output=True, text=True, check=True).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+        import_ms = statistics.median(run["import"] for run in runs) * 1e3
+        window_ms = statistics.median(run["window"] for run in runs) * 1e3
+        rss = statistics.median(run["rss_mb"] for run in runs)
+        line = f"{module:>10}: import {import_ms:6.1f} ms"
+        if gui:
+            line += f", first window {window_ms:6.1f} ms, total {import_ms + window_ms:6.1f} ms"
+        print(line + f", max RSS {rss:.0f} MB (median of {args.runs})")
+        if gui and args.budget_ms and import_ms + window_ms > args.budget_ms:
+            print(f"startup over the {args.budget_ms:.0f} ms budget")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+def bench_bypass(args):
+    from PyQt6.QtCore import QCoreApplication, Qt
+    from qt_app import SerialThread
+
+    app = QCoreApplication(sys.argv)
+    # Something shaped like a help_all listing, ending in a prompt without a newline
+    lines = [f"cmd_{i:03d} <arg> : description of command number {i}\r\n" for i in range(args.lines)]
+    text = "".join(lines) + ">> "
+    stream = text.encode("latin-1")
+
+    print(f"{'interval':>9} {'signals':>8} {'lines':>6} {'elapsed s':>10} {'intact':>7}")
+    for text_interval in args.text_interval:
+        thread = SerialThread("loop://", args.baud, text_interval=text_interval)
+        thread.set_auto_report(False)
+        received = []
+        thread.text_received.connect(received.append, Qt.ConnectionType.DirectConnection)
+        thread.start()
+        while thread.serial_port is None or not thread.running:
+            time.sleep(0.01)
+
+        # Pace the writer at the line rate (10 bits per byte)
+        bytes_per_tick = max(1, int(args.baud / 10 * 0.01))
+        start = time.perf_counter()
+        for offset in range(0, len(stream), bytes_per_tick):
+            thread.serial_port.write(stream[offset:offset + bytes_per_tick])
+            time.sleep(max(0.0, start + (offset // bytes_per_tick + 1) * 0.01 - time.perf_counter()))
+        while not "".join(received).endswith(">> ") and time.perf_counter() - start < 10:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        thread.stop()
+        thread.wait()
+
+        joined = "".join(received)
+        intact = joined == "B" + text  # loop:// echoes the b'B' written on open
+        print(f"{text_interval:>9} {len(received):>8} {len(lines):>6} {elapsed:>10.2f} {str(intact):>7}")
+    del app
+
+class FakeConsole:
+    # Stands in for the board on a socket:// port: answers each command line
+    # with its echo, a few lines of values and the "> " prompt after delay
+    # seconds, paced at the line rate, and streams telemetry frames at
+    # frame_rate while auto report is on (b'B' starts it, ESC stops it)
+    def __init__(self, baud, delay, frame_rate, response_lines=12):
+        import socket
+        import threading
+
+        self.byte_time = 10 / baud
+        self.delay = delay
+        self.frame_interval = 1 / frame_rate if frame_rate else None
+        self.response_lines = response_lines
+        self.server = socket.socket()
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        self.url = f"socket://127.0.0.1:{self.server.getsockname()[1]}"
+        self.auto_report = False
+        self.running = True
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def send(self, conn, data):
+        try:
+            conn.sendall(data)
+        except OSError:
+            self.running = False  # the reader went away
+        time.sleep(len(data) * self.byte_time)
+
+    def serve(self):
+        conn, _ = self.server.accept()
+        conn.settimeout(0.005)
+        frame = stuff_frame(make_telemetry_frame(random.Random(0)))
+        line = b''
+        next_frame = time.perf_counter()
+        while self.running:
+            try:
+                data = conn.recv(4096)
+                if not data:
+                    break
+            except OSError:
+                data = b''
+            for byte in data:
+                if byte == ord('B'):
+                    self.auto_report = True
+                elif byte == 0x1B:
+                    self.auto_report = False
+                elif byte == ord('\n'):
+                    time.sleep(self.delay)
+                    command = line.decode()
+                    body = "".join(f"{command}_{i}: {i * 1.25:.2f}\r\n" for i in range(self.response_lines))
+                    self.send(conn, f"{command}\r\n{body}> ".encode())
+                    line = b''
+                else:
+                    line += bytes([byte])
+            if self.auto_report and self.frame_interval and time.perf_counter() >= next_frame:
+                next_frame += self.frame_interval
+                self.send(conn, frame)
+        conn.close()
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.server.close()
+
+def bench_commands(args):
+    from PyQt6.QtCore import QCoreApplication, Qt
+    from qt_app import SerialThread
+
+    app = QCoreApplication(sys.argv)
+    commands = ["pmu_get_all", "pdu_get_all", "iou_get_all"]
+
+    print(f"{'auto report':>11} {'in flight':>9} {'commands':>8} {'elapsed s':>10} {'per cmd ms':>10} "
+          f"{'p50 ms':>7} {'max ms':>7} {'timeouts':>8} {'frames':>7}")
+    for auto_report in (False, True):
+        for max_in_flight in args.in_flight:
+            console = FakeConsole(args.baud, args.delay, args.frame_rate)
+            thread = SerialThread(console.url, args.baud)
+            thread.set_auto_report(auto_report)
+            thread.commands.max_in_flight = max_in_flight
+            results = []
+            frames = []
+            thread.command_completed.connect(results.append, Qt.ConnectionType.DirectConnection)
+            thread.data_received.connect(lambda length, data, status: frames.append(status), Qt.ConnectionType.DirectConnection)
+            thread.start()
+            while thread.serial_port is None or not thread.running:
+                time.sleep(0.01)
+
+            # Fire everything back to back, like a script would
+            start = time.perf_counter()
+            for i in range(args.commands):
+                thread.submit_command(commands[i % len(commands)] + "\n")
+            while len(results) < args.commands and time.perf_counter() - start < args.commands * 2.5:
+                time.sleep(0.005)
+            elapsed = time.perf_counter() - start
+            thread.running = False  # let run() close the socket, stop() would pull it from under read()
+            thread.wait()
+            console.close()
+
+            latencies = sorted(result.latency * 1000 for result in results)
+            timeouts = sum(result.status == "timeout" for result in results)
+            print(f"{'on' if auto_report else 'off':>11} {max_in_flight:>9} {len(results):>8} {elapsed:>10.2f} "
+                  f"{elapsed * 1000 / max(len(results), 1):>10.1f} {statistics.median(latencies) if latencies else 0:>7.1f} "
+                  f"{latencies[-1] if latencies else 0:>7.1f} {timeouts:>8} {frames.count('ok'):>7}")
+    del app
+
+
+def bench_macro(args):
+    import serial
+    from macro import MACROS, MacroRun, run_macro
+
+    print(f"{'pace ms':>8} {'commands':>8} {'ok':>4} {'elapsed s':>10} {'values':>7}")
+    for pace in args.pace:
+        console = FakeConsole(args.baud, args.delay, args.frame_rate)
+        run = MacroRun(args.macro, MACROS[args.macro], pace / 1000)
+        with serial.serial_for_url(console.url, baudrate=args.baud, timeout=0.05) as port:
+            port.write(b'B')  # auto report on, responses arrive between frames
+            report = run_macro(port, run)
+        console.close()
+        values = sum(len(step["values"]) for step in report["steps"])
+        print(f"{pace:>8} {report['commands']:>8} {report['ok']:>4} {report['elapsed_s']:>10.2f} {values:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial Frame Collector benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    read_parser = subparsers.add_parser("read", help="SerialThread throughput over a loop:// port")
+    read_parser.add_argument("--baud", type=int, action="append", help="baud rate, repeatable (default: all)")
+    read_parser.add_argument("--chunk-size", type=int, nargs="+", default=[1, 4096], help="read_chunk_size values to compare")
+    read_parser.add_argument("--duration", type=float, default=2.0, help="seconds per run")
+    read_parser.add_argument("--rs422", action="store_true", help="fixed 282 byte frames instead of RF framing")
+    read_parser.add_argument("--batch-interval", type=float, help="deliver frames_received batches this many seconds apart")
+    read_parser.add_argument("--capture", action="store_true", help="also run the raw capture tap")
+    read_parser.set_defaults(func=bench_read)
+
+    crc_parser = subparsers.add_parser("crc", help="CRC-16 implementations over 278 byte payloads")
+    crc_parser.add_argument("--frames", type=int, default=500)
+    crc_parser.add_argument("--repeat", type=int, default=5)
+    crc_parser.add_argument("--seed", type=int, default=0)
+    crc_parser.set_defaults(func=bench_crc)
+
+    destuff_parser = subparsers.add_parser("destuff", help="byte destuffing, fuzzed against the old state machine")
+    destuff_parser.add_argument("--fuzz", type=int, default=100000)
+    destuff_parser.add_argument("--repeat", type=int, default=2000)
+    destuff_parser.add_argument("--seed", type=int, default=0)
+    destuff_parser.set_defaults(func=bench_destuff)
+
+    parse_parser = subparsers.add_parser("parse", help="FrameParser throughput without Qt or a serial port")
+    parse_parser.add_argument("--file", help="raw byte stream or capture (.cap) to parse instead of synthetic frames")
+    parse_parser.add_argument("--frames", type=int, default=20000)
+    parse_parser.add_argument("--chunk-size", type=int, default=4096)
+    parse_parser.add_argument("--rs422", action="store_true")
+    parse_parser.add_argument("--frame-size", type=int, default=RS422_FRAME_LENGTH, help="RS422 packet size (set_byte_rs422)")
+    parse_parser.add_argument("--seed", type=int, default=0)
+    parse_parser.set_defaults(func=bench_parse)
+
+    resync_parser = subparsers.add_parser("resync", help="RS422 resync on a stream with injected byte drops")
+    resync_parser.add_argument("--frames", type=int, default=20000)
+    resync_parser.add_argument("--drop-rate", type=float, default=0.01, help="fraction of frames losing one byte")
+    resync_parser.add_argument("--chunk-size", type=int, default=4096)
+    resync_parser.add_argument("--seed", type=int, default=0)
+    resync_parser.set_defaults(func=bench_resync)
+
+    gui_parser = subparsers.add_parser("gui", help="per-frame GUI update time on the offscreen Qt platform")
+    gui_parser.add_argument("--frames", type=int, default=200)
+    gui_parser.add_argument("--seed", type=int, default=0)
+    gui_parser.add_argument("--render-interval", type=int, default=0, help="MainWindow.render_interval in ms, 0 renders every frame")
+    gui_parser.set_defaults(func=bench_gui)
+
+    decode_parser = subparsers.add_parser("decode", help="telemetry decode through the compiled frame layout")
+    decode_parser.add_argument("--frames", type=int, default=1000)
+    decode_parser.add_argument("--repeat", type=int, default=20)
+    decode_parser.add_argument("--seed", type=int, default=0)
+    decode_parser.set_defaults(func=bench_decode)
+
+    batch_parser = subparsers.add_parser("batch", help="NumPy columnar decode of many telemetry frames")
+    batch_parser.add_argument("--frames", type=int, default=1000000)
+    batch_parser.add_argument("--seed", type=int, default=0)
+    batch_parser.add_argument("--check", type=int, default=2000, help="frames compared against the per-frame decoders")
+    batch_parser.set_defaults(func=bench_batch)
+
+    log_parser = subparsers.add_parser("log", help="text vs binary frame log size and write cost")
+    log_parser.add_argument("--frames", type=int, default=20000)
+    log_parser.add_argument("--seed", type=int, default=0)
+    log_parser.set_defaults(func=bench_log)
+
+    image_parser = subparsers.add_parser("image", help="image chunk reassembly vs the old per-chunk file writes")
+    image_parser.add_argument("--images", type=int, default=200)
+    image_parser.add_argument("--loss", type=float, default=0.005, help="probability of a lost chunk")
+    image_parser.add_argument("--reorder", type=float, default=0.005, help="probability of two neighbouring chunks swapping")
+    image_parser.add_argument("--seed", type=int, default=0)
+    image_parser.set_defaults(func=bench_image)
+
+    session_parser = subparsers.add_parser("session", help="indexed session random access vs a linear binlog scan")
+    session_parser.add_argument("--frames", type=int, default=500000)
+    session_parser.add_argument("--lookups", type=int, default=100000)
+    session_parser.add_argument("--seed", type=int, default=0)
+    session_parser.set_defaults(func=bench_session)
+
+    replay_parser = subparsers.add_parser("replay", help="end-to-end throughput replaying a recording")
+    replay_parser.add_argument("--file", help="binary log, session (.frames) or raw dump, default a synthetic binary log")
+    replay_parser.add_argument("--frames", type=int, default=20000, help="frames in the synthetic log")
+    replay_parser.add_argument("--speed", type=float, default=0, help="playback speed, 0 is as fast as possible")
+    replay_parser.add_argument("--batch-interval", type=float, help="SerialThread batch interval, the GUI uses its own")
+    replay_parser.add_argument("--rs422", action="store_true")
+    replay_parser.add_argument("--gui", action="store_true", help="through MainWindow on the offscreen platform")
+    replay_parser.add_argument("--seed", type=int, default=0)
+    replay_parser.set_defaults(func=bench_replay)
+
+    startup_parser = subparsers.add_parser("startup", help="GUI import and time to first window, collector import")
+    startup_parser.add_argument("--runs", type=int, default=5)
+    startup_parser.add_argument("--budget-ms", type=float, help="exit with an error if the GUI takes longer to show")
+    startup_parser.set_defaults(func=bench_startup)
+
+    bypass_parser = subparsers.add_parser("bypass", help="command response text signals with auto report off")
+    bypass_parser.add_argument("--baud", type=int, default=115200)
+    bypass_parser.add_argument("--lines", type=int, default=300)
+    bypass_parser.add_argument("--text-interval", type=float, nargs="+", default=[0, 0.05],
+                               help="SerialThread text_interval values, 0 emits every read like the old per-chunk signal")
+    bypass_parser.set_defaults(func=bench_bypass)
+
+    commands_parser = subparsers.add_parser("commands", help="queued get_all commands against a simulated console")
+    commands_parser.add_argument("--baud", type=int, default=115200)
+    commands_parser.add_argument("--commands", type=int, default=60)
+    commands_parser.add_argument("--delay", type=float, default=0.01, help="seconds the console takes per command")
+    commands_parser.add_argument("--frame-rate", type=float, default=20.0, help="telemetry frames per second with auto report on")
+    commands_parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 2], help="CommandQueue max_in_flight values")
+    commands_parser.set_defaults(func=bench_commands)
+
+    macro_parser = subparsers.add_parser("macro", help="a built-in macro against a simulated console")
+    macro_parser.add_argument("--macro", default="health_sweep")
+    macro_parser.add_argument("--baud", type=int, default=115200)
+    macro_parser.add_argument("--delay", type=float, default=0.01, help="seconds the console takes per command")
+    macro_parser.add_argument("--frame-rate", type=float, default=20.0, help="telemetry frames per second")
+    macro_parser.add_argument("--pace", type=int, nargs="+", default=[0, 100, 250], help="inter-command pacing in ms")
+    macro_parser.set_defaults(func=bench_macro)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import argparse
+import struct
+import sys
+import time
+import zlib
+from collections import namedtuple
+
+# File: header, then records. A record is "<HdB" (frame length, monotonic
+# receive time in seconds, status) followed by the raw frame bytes. In a
+# compressed file the records are grouped into zlib chunks, each prefixed
+# with "<II" (compressed size, raw size).
+MAGIC = b'SLBLOG'
+VERSION = 1
+FLAG_COMPRESSED = 0x01
+
+HEADER_STRUCT = struct.Struct("<6sBBdd")  # magic, version, flags, wall clock start, monotonic start
+RECORD_STRUCT = struct.Struct("<HdB")
+CHUNK_STRUCT = struct.Struct("<II")
+
+STATUS_CODES = {"ok": 0, "crc_fail": 1, "length_fail": 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+STATUS_TEXT = {"ok": "OK", "crc_fail": "CRC Failed", "length_fail": "Frame Length Failed"}
+
+# wall_time is time.time() reconstructed from the header, status is the name
+LogRecord = namedtuple("LogRecord", ["timestamp", "wall_time", "status", "data"])
+
+
+def format_frame_text(data, status, timestamp):
+    # The text log entry written by the GUI, timestamp is already "%H:%M:%S"
+    text = f"{timestamp}: Frame {len(data)}: "
+    text += ", ".join([f"0x{byte:02X}" for byte in data])
+    text += f"\nTotal bytes: {len(data)}\n"
+    if status in STATUS_TEXT:
+        text += f"Status: {STATUS_TEXT[status]}\n\n"
+    return text
+
+
+class BinaryLogWriter:
+    # file can be any binary file-like object (e.g. a LogWriter handle) instead of a path
+    def __init__(self, path=None, compress=False, chunk_size=65536, file=None):
+        self.file = file if file is not None else open(path, "wb")
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.chunk = bytearray()
+        self.wall_start = time.time()
+        self.monotonic_start = time.monotonic()
+        flags = FLAG_COMPRESSED if compress else 0
+        self.file.write(HEADER_STRUCT.pack(MAGIC, VERSION, flags, self.wall_start, self.monotonic_start))
+
+    def write_frame(self, data, status, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        record = RECORD_STRUCT.pack(len(data), timestamp, STATUS_CODES[status]) + bytes(data)
+        if not self.compress:
+            self.file.write(record)
+            return
+        self.chunk += record
+        if len(self.chunk) >= self.chunk_size:
+            self.write_chunk()
+
+    def write_chunk(self):
+        if self.chunk:
+            compressed = zlib.compress(bytes(self.chunk))
+            self.file.write(CHUNK_STRUCT.pack(len(compressed), len(self.chunk)) + compressed)
+            self.chunk = bytearray()
+
+    def flush(self):
+        # A compressed log only becomes readable up to the last completed chunk
+        self.write_chunk()
+        self.file.flush()
+
+    def close(self):
+        self.write_chunk()
+        self.file.close()
+
+
+def read_binary_log(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_STRUCT.size)
+        magic, version, flags, wall_start, monotonic_start = HEADER_STRUCT.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} binary log")
+        if flags & FLAG_COMPRESSED:
+            blocks = read_chunks(f)
+        else:
+            blocks = [f.read()]
+        for block in blocks:
+            for timestamp, status, data in iter_records(block):
+                yield LogRecord(timestamp, wall_start + timestamp - monotonic_start, STATUS_NAMES[status], data)
+
+def read_chunks(f):
+    while True:
+        header = f.read(CHUNK_STRUCT.size)
+        if len(header) < CHUNK_STRUCT.size:
+            return
+        compressed_size, raw_size = CHUNK_STRUCT.unpack(header)
+        compressed = f.read(compressed_size)
+        if len(compressed) < compressed_size:
+            return  # chunk cut short by a crash, everything before it is intact
+        yield zlib.decompress(compressed)
+
+def iter_records(block):
+    pos = 0
+    while pos + RECORD_STRUCT.size <= len(block):
+        length, timestamp, status = RECORD_STRUCT.unpack_from(block, pos)
+        pos += RECORD_STRUCT.size
+        if pos + length > len(block):
+            return  # truncated last record
+        yield timestamp, status, block[pos:pos + length]
+        pos += length
+
+
+def convert_to_text(path, out, statuses=None):
+    count = 0
+    for record in read_binary_log(path):
+        if statuses is None or record.status in statuses:
+            timestamp = time.strftime("%H:%M:%S", time.localtime(record.wall_time))
+            out.write(format_frame_text(record.data, record.status, timestamp))
+            count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a binary frame log to the text log format")
+    parser.add_argument("path", help="binary log written by the collector")
+    parser.add_argument("-o", "--output", help="text file to write, default stdout")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--errors", action="store_true", help="only failed frames, like error_*.txt")
+    group.add_argument("--all", action="store_true", help="every frame regardless of status")
+    args = parser.parse_args()
+
+    if args.all:
+        statuses = None
+    elif args.errors:
+        statuses = {"crc_fail", "length_fail"}
+    else:
+        statuses = {"ok"}  # like log_*.txt
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        count = convert_to_text(args.path, out, statuses)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{count} frames converted", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# Raw serial bytes exactly as read, before any framing. A file is a header
+# followed by records: "<dI" (monotonic receive time, length) then the chunk.
+MAGIC = b'SLRCAP'
+VERSION = 1
+HEADER_STRUCT = struct.Struct("<6sBdd")  # magic, version, wall clock start, monotonic start
+RECORD_STRUCT = struct.Struct("<dI")
+CAPTURE_SUFFIX = ".cap"
+
+CaptureRecord = namedtuple("CaptureRecord", ["timestamp", "wall_time", "data"])
+
+
+class CaptureWriter(threading.Thread):
+    # Takes chunks from the serial reader thread and writes them from its own
+    # thread into base_path_001.cap, _002.cap, ... starting a new file every
+    # max_bytes and deleting the oldest beyond max_files (0 keeps them all).
+    def __init__(self, base_path, max_bytes=64 * 1024 * 1024, max_files=10, max_queue=10000):
+        super().__init__(daemon=True)
+        self.base_path = base_path
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_queue = max_queue
+        self.queue = queue.Queue()
+        self.file = None
+        self.file_bytes = 0
+        self.paths = []
+        self.stopped = False
+        self.chunks = 0
+        self.bytes_captured = 0
+        self.dropped_chunks = 0
+
+    def write(self, data):
+        if self.stopped:
+            return
+        if self.queue.qsize() >= self.max_queue:
+            self.dropped_chunks += 1
+            return
+        self.queue.put((time.monotonic(), bytes(data)))
+
+    def close(self):
+        if not self.stopped:
+            self.stopped = True
+            self.queue.put(None)
+        self.join()
+
+    def run(self):
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                timestamp, data = item
+                if self.file is None or self.file_bytes >= self.max_bytes:
+                    self.rotate()
+                self.file.write(RECORD_STRUCT.pack(timestamp, len(data)) + data)
+                self.file_bytes += RECORD_STRUCT.size + len(data)
+                self.chunks += 1
+                self.bytes_captured += len(data)
+        except OSError as e:
+            print(f"Error writing capture {self.base_path}: {str(e)}")
+        finally:
+            if self.file is not None:
+                self.file.close()
+
+    def rotate(self):
+        if self.file is not None:
+            self.file.close()
+        path = f"{self.base_path}_{len(self.paths) + 1:03d}{CAPTURE_SUFFIX}"
+        self.file = open(path, "wb")
+        self.file.write(HEADER_STRUCT.pack(MAGIC, VERSION, time.time(), time.monotonic()))
+        self.file_bytes = HEADER_STRUCT.size
+        self.paths.append(path)
+        if self.max_files and len(self.paths) > self.max_files:
+            os.remove(self.paths[-self.max_files - 1])
+
+
+def read_capture(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, wall_start, monotonic_start = HEADER_STRUCT.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} raw capture")
+    pos = HEADER_STRUCT.size
+    while pos + RECORD_STRUCT.size <= len(data):
+        timestamp, length = RECORD_STRUCT.unpack_from(data, pos)
+        pos += RECORD_STRUCT.size
+        if pos + length > len(data):
+            return  # chunk cut short by a crash
+        yield CaptureRecord(timestamp, wall_start + timestamp - monotonic_start, data[pos:pos + length])
+        pos += length
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract the raw serial bytes from capture files")
+    parser.add_argument("paths", nargs="+", help="capture files, in order")
+    parser.add_argument("-o", "--output", required=True, help="raw byte file to write")
+    args = parser.parse_args()
+
+    count = 0
+    size = 0
+    with open(args.output, "wb") as out:
+        for path in args.paths:
+            for record in read_capture(path):
+                out.write(record.data)
+                count += 1
+                size += len(record.data)
+    print(f"{count} chunks, {size} bytes extracted", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
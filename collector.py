@@ -0,0 +1,250 @@
+import argparse
+import json
+import signal
+import struct
+import sys
+import time
+
+import serial
+
+from binlog import BinaryLogWriter, format_frame_text
+from capture import CaptureWriter
+from frame_parser import RS422_FRAME_LENGTH, RS422_FRAME_SIZE_MAX, RS422_FRAME_SIZE_MIN, FrameParser
+from image_assembler import ImageAssembler
+from log_writer import LogWriter
+from replay import ReplayPort, is_replay_url
+from session import SessionWriter
+from telemetry import decode_gps, decode_telemetry
+
+# Headless counterpart of qt_app.py for the ground station box: same framing,
+# logs and decode, no Qt. Stops on SIGTERM/SIGINT and reopens the port when it
+# goes away, so it can run under systemd indefinitely.
+
+
+class Collector:
+    def __init__(self, port, baud_rate=115200, is_rf_mode=True, rs422_frame_size=RS422_FRAME_LENGTH,
+                 log_format="binary", session=True, capture=False, replay_speed=1.0, read_chunk_size=4096):
+        self.port_name = port
+        self.baud_rate = baud_rate
+        self.parser = FrameParser(is_rf_mode, rs422_frame_size=rs422_frame_size)
+        self.log_format = log_format
+        self.record_session = session
+        self.record_capture = capture
+        self.replay_speed = replay_speed
+        self.read_chunk_size = read_chunk_size
+        self.telemetry_out = None  # file for one JSON line per telemetry frame
+        self.running = False
+        self.serial_port = None
+
+        self.log_writer = LogWriter()
+        self.log_file = None
+        self.error_file = None
+        self.binary_log = None
+        self.session = None
+        self.capture = None
+        self.image_assembler = ImageAssembler(self.log_writer.write_file)
+        self.image_log = None
+        self.log_time = None
+
+        self.start_time = time.monotonic()
+        self.counters = {"ok": 0, "crc_fail": 0, "length_fail": 0, "telemetry": 0, "images": 0}
+        self.bytes_read = 0
+        self.reconnects = 0
+
+    def frame_length(self):
+        return self.parser.frame_length
+
+    def open_logs(self):
+        current_time = time.strftime("%H_%M_%S")
+        self.log_time = current_time
+        if self.log_format == "text":
+            self.log_file = self.log_writer.open(f"log_{current_time}.txt", "w")
+            self.error_file = self.log_writer.open(f"error_{current_time}.txt", "w")
+        elif self.log_format in ("binary", "binary_zlib"):
+            log_file = self.log_writer.open(f"log_{current_time}.bin", "wb")
+            self.binary_log = BinaryLogWriter(compress=self.log_format == "binary_zlib", file=log_file)
+        if self.record_session:
+            self.session = SessionWriter(f"session_{current_time}", opener=self.log_writer.open)
+        if self.record_capture:
+            self.capture = CaptureWriter(f"capture_{current_time}")
+            self.capture.start()
+
+    def close_logs(self):
+        self.write_image_reports(self.image_assembler.flush())
+        for log in (self.log_file, self.error_file, self.binary_log, self.session, self.capture, self.image_log):
+            if log is not None:
+                log.close()
+        self.log_file = self.error_file = self.binary_log = self.session = self.capture = self.image_log = None
+
+    def open_port(self):
+        if is_replay_url(self.port_name):
+            self.serial_port = ReplayPort.from_url(self.port_name, self.parser.is_rf_mode, self.baud_rate, self.replay_speed)
+        else:
+            self.serial_port = serial.serial_for_url(self.port_name, baudrate=self.baud_rate, timeout=1)
+        self.serial_port.write(b'B')  # auto report start
+        self.parser.reset()
+
+    def close_port(self):
+        if self.serial_port is not None and self.serial_port.is_open:
+            self.serial_port.close()
+        self.serial_port = None
+
+    def read(self):
+        # One read from the port, returns False once a replay has ended
+        size = min(max(self.serial_port.in_waiting, 1), self.read_chunk_size)
+        data = self.serial_port.read(size)
+        if not data:
+            return not getattr(self.serial_port, "exhausted", False)
+        self.bytes_read += len(data)
+        if self.capture is not None:
+            self.capture.write(data)
+        for frame in self.parser.feed(data):
+            self.handle_frame(frame.data, frame.status)
+        return True
+
+    def handle_frame(self, data, status):
+        self.counters[status] += 1
+        if self.session:
+            self.session.write_frame(data, status)
+        if self.binary_log:
+            self.binary_log.write_frame(data, status)
+        elif self.log_file:
+            text = format_frame_text(data, status, time.strftime("%H:%M:%S"))
+            (self.log_file if status == "ok" else self.error_file).write(text)
+
+        if len(data) != self.frame_length():
+            return
+        if data[2] != 0xFF:
+            self.counters["images"] += 1
+            self.write_image_reports(self.image_assembler.add(data, status))
+            return
+        self.counters["telemetry"] += 1
+        if self.telemetry_out is not None and status == "ok":
+            try:
+                self.write_telemetry(data)
+            except (ValueError, struct.error) as e:
+                # One undecodable frame must not stop the collector
+                print(f"Error decoding telemetry: {str(e)}", file=sys.stderr)
+
+    def write_image_reports(self, reports):
+        for report in reports:
+            if self.image_log is None:
+                self.image_log = self.log_writer.open(f"images_{self.log_time}.jsonl", "w")
+            self.image_log.write(json.dumps(report._asdict()) + "\n")
+
+    def write_telemetry(self, data):
+        record = {"time": time.time(), "values": decode_telemetry(data)}
+        gps = decode_gps(data)
+        if gps is not None:  # None without a fix
+            utc_time, latitude, longitude = gps
+            record["gps"] = {"utc": utc_time, "lat": latitude, "lon": longitude}
+        self.telemetry_out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.telemetry_out.flush()
+
+    def stats(self):
+        log_stats = self.log_writer.stats()
+        stats = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "uptime": round(time.monotonic() - self.start_time, 3),
+            "port": self.port_name,
+            "connected": self.serial_port is not None,
+            "reconnects": self.reconnects,
+            "bytes_read": self.bytes_read,
+            "discarded_bytes": self.parser.discarded_bytes,
+            "log_queue": log_stats["queue_depth"],
+            "log_dropped": log_stats["dropped_items"],
+            "images_written": self.image_assembler.images,
+            "images_complete": self.image_assembler.complete_images,
+        }
+        stats.update(self.counters)
+        return stats
+
+    def format_stats(self, stats, previous):
+        elapsed = stats["uptime"] - previous.get("uptime", 0)
+        rate = (stats["ok"] - previous.get("ok", 0)) / elapsed if elapsed else 0.0
+        state = "connected" if stats["connected"] else "waiting for port"
+        return (f"{stats['time']} {stats['port']} {state}: {stats['ok']} ok ({rate:.1f}/s), "
+                f"{stats['crc_fail']} crc fail, {stats['length_fail']} length fail, "
+                f"{stats['discarded_bytes']} bytes skipped, {stats['images']} image frames "
+                f"({stats['images_complete']}/{stats['images_written']} images complete), "
+                f"log queue {stats['log_queue']} ({stats['log_dropped']} dropped)")
+
+    def run(self, stats_interval=10.0, json_stats=False, retry_interval=5.0):
+        self.running = True
+        self.log_writer.start()
+        self.open_logs()
+        previous = {}
+        next_stats = time.monotonic() + stats_interval
+        try:
+            while self.running:
+                if self.serial_port is None:
+                    try:
+                        self.open_port()
+                    except serial.SerialException as e:
+                        print(f"Error opening {self.port_name}: {str(e)}", file=sys.stderr)
+                        if is_replay_url(self.port_name):
+                            break
+                        time.sleep(retry_interval)
+                try:
+                    if self.serial_port is not None and not self.read():
+                        break  # end of the replayed recording
+                except (serial.SerialException, OSError) as e:
+                    print(f"Error reading {self.port_name}: {str(e)}", file=sys.stderr)
+                    self.close_port()
+                    self.reconnects += 1
+                self.write_image_reports(self.image_assembler.poll())
+                if stats_interval and time.monotonic() >= next_stats:
+                    next_stats += stats_interval
+                    stats = self.stats()
+                    print(json.dumps(stats) if json_stats else self.format_stats(stats, previous), file=self.stats_out(), flush=True)
+                    previous = stats
+        finally:
+            stats = self.stats()
+            self.close_port()
+            self.close_logs()
+            self.log_writer.stop()
+            print(json.dumps(stats) if json_stats else self.format_stats(stats, previous), file=self.stats_out(), flush=True)
+
+    def stats_out(self):
+        # stdout stays pure JSON lines when the telemetry goes there
+        return sys.stderr if self.telemetry_out is sys.stdout else sys.stdout
+
+    def stop(self, *args):
+        self.running = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect frames without the GUI")
+    parser.add_argument("port", help="serial port (COM5, /dev/ttyUSB0), any pyserial URL or replay://<recording>")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--rs422", action="store_true", help="fixed size RS422 frames instead of RF framing")
+    parser.add_argument("--rs422-frame-size", type=int, default=RS422_FRAME_LENGTH)
+    parser.add_argument("--log", choices=["text", "binary", "binary_zlib", "none"], default="binary", help="frame log format")
+    parser.add_argument("--no-session", action="store_true", help="don't write the indexed session files")
+    parser.add_argument("--capture", action="store_true", help="also record the raw port bytes")
+    parser.add_argument("--telemetry", metavar="FILE", help="write each decoded telemetry frame as a JSON line, - for stdout")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="seconds between stats lines, 0 only prints them at exit")
+    parser.add_argument("--json", action="store_true", help="print the stats as JSON lines")
+    parser.add_argument("--retry-interval", type=float, default=5.0, help="seconds between attempts to reopen the port")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="for replay:// ports, 0 is as fast as possible")
+    args = parser.parse_args()
+    if not RS422_FRAME_SIZE_MIN <= args.rs422_frame_size <= RS422_FRAME_SIZE_MAX:
+        parser.error(f"--rs422-frame-size must be {RS422_FRAME_SIZE_MIN}..{RS422_FRAME_SIZE_MAX}")
+
+    collector = Collector(args.port, args.baud, not args.rs422, args.rs422_frame_size, args.log,
+                          session=not args.no_session, capture=args.capture, replay_speed=args.replay_speed)
+    if args.telemetry == "-":
+        collector.telemetry_out = sys.stdout
+    elif args.telemetry:
+        collector.telemetry_out = open(args.telemetry, "a", encoding="utf-8")
+    signal.signal(signal.SIGTERM, collector.stop)
+    signal.signal(signal.SIGINT, collector.stop)
+    try:
+        collector.run(args.stats_interval, args.json, args.retry_interval)
+    finally:
+        if collector.telemetry_out not in (None, sys.stdout):
+            collector.telemetry_out.close()
+
+
+if __name__ == "__main__":
+    main()
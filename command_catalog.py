@@ -0,0 +1,154 @@
+from collections import namedtuple
+
+from frame_parser import RS422_FRAME_SIZE_MAX, RS422_FRAME_SIZE_MIN
+
+# Console commands of the CPOC board, grouped the way help_all lists them.
+# Every argument is an integer; low/high/choices are only given where the
+# firmware documents a range, anything else is passed through unchecked.
+Arg = namedtuple("Arg", ["name", "low", "high", "choices"], defaults=(None, None, None))
+Command = namedtuple("Command", ["name", "args", "description"])
+
+ON_OFF = Arg("state", 0, 1)
+BAUD_RATES = (9600, 19200, 38400, 115200, 230400, 460800)
+
+CATALOG = [
+    ("SIMPLE COMMAND", [
+        Command("help", (), "Display list of simple help commands"),
+        Command("help_all", (), "Display list of ALL!!! commands"),
+        Command("help_cpoc", (), "Display list of CPOC commands"),
+        Command("help_pmu", (), "Display list of PMU commands"),
+        Command("help_pdu", (), "Display list of PDU commands"),
+        Command("help_cam", (), "Display list of CAM commands"),
+        Command("help_iou", (), "Display list of IOU commands"),
+        Command("splash", (), "Splash screen again"),
+    ]),
+    ("CPOC CMD", [
+        Command("status_now", (), "Display <Date&Time>, <Temp> *C, <HardwareVer>, <FirmwareVer>, <Enable>, <Mode>"),
+        Command("auto_report_ena", (), "Enable Mirror 282 byte to Text as Debug Port [ESC]"),
+        Command("rs422_report_ena", (), "Report 282 byte packet to RS422, [ESC] to stop***"),
+        Command("set_byte_rs422", (Arg("size", RS422_FRAME_SIZE_MIN, RS422_FRAME_SIZE_MAX),),
+                "Set Size of packet RS422, Default 282 (150<x<1000)"),
+        Command("set_baud_rs422", (Arg("baudrate", choices=BAUD_RATES),),
+                "[9600|19200|38400|115200|230400|460800], Default 115200"),
+        Command("set_fre_rs422", (Arg("packet", 0, 12),), "[0(0.5)|1|2|3|4|5|6|7|8|9|10|11|12], Packet per second"),
+        Command("swap_byte_ena", (), "Enable swap byte RS422, 0x02->0xFE, 0x03->0xFD"),
+        Command("swap_byte_dis", (), "Disable swap byte RS422"),
+        Command("push_data", (Arg("data"), Arg("position")), "Test push data to FRAM"),
+        Command("pop_data", (Arg("position"),), "Test pop data from FRAM"),
+        Command("recovery_setmode", (Arg("0-off/1-on", 0, 1),), "PowerLost - Returns to previous state"),
+        Command("send_frame_status", (), "Send Frame Status"),
+        Command("send_frame_cam", (Arg("packet_count", 0, 26),), "Send Frame CAM with packet_count [0-26]"),
+        Command("memory_usage", (), "%RAM and %FLASH Used"),
+        Command("time_get", (), "Get RTC Time"),
+        Command("time_set", (Arg("hh", 0, 23), Arg("mm", 0, 59), Arg("ss", 0, 59), Arg("DD", 1, 31), Arg("MM", 1, 12), Arg("YY", 0, 99)),
+                "Time Setting, Eg. 12:01 31/7/2024 -> 12 01 0 31 7 24"),
+        Command("cpoc_reset", (), "Reset CPOC Board"),
+        Command("board_alive", (), "Hello to specified board, check alive"),
+        Command("mux_mode", (), "Set Mux UART Mode"),
+        Command("rf_ena", (), "Enable RF Module"),
+        Command("rf_dis", (), "Disable RF Module"),
+        Command("gps_get", (), "Get GPS Data"),
+        Command("gps_auto", (), "Continuously send  GPS Data to LORA"),
+        Command("gps_format", (Arg("1-On/0-Off", 0, 1),), "Format GPS Data"),
+    ]),
+    ("PMU CMD", [
+        Command("pmu_get_temp", (), "Response 4 NTC channel in Celsius "),
+        Command("pmu_bat_vol", (), "Response 4 BAT channel in Voltage"),
+        Command("pmu_parag_in", (), "Response V_in, I_in from 28V source"),
+        Command("pmu_parag_out", (), "Response V_out, I_out from output 14.4V source"),
+        Command("pmu_set_tpoint", (Arg("low"), Arg("high")), "Set lowpoint < highpoint to control heater temp"),
+        Command("pmu_set_output", (Arg("0/1 EN/DIS", 0, 1),), "Enable/disable output 14.4v"),
+        Command("pmu_set_pwm", (Arg("Duty", 0, 100),), "Set PWM control in %(0-100) of 14.4v ->(0-100)"),
+        Command("pmu_set_heater", (Arg("channel"), ON_OFF), "Turn on/off the heater ->(0: OFF, 1: ON)"),
+        Command("pmu_auto_heater", (ON_OFF,), "Turn on/off auto control heater ->(0: OFF, 1: ON)"),
+        Command("pmu_get_all", (), "Response all Params in this board"),
+    ]),
+    ("PDU CMD", [
+        Command("pdu_set_channel", (Arg("channel"), ON_OFF), "Turn on/off channel N ->(0: OFF, 1: ON)"),
+        Command("pdu_set_buck", (Arg("buck"), ON_OFF), "Turn on/off buck N ->(0: OFF, 1: ON)"),
+        Command("pdu_set_all", (ON_OFF,), "Turn on/off buck + channel ->(0: OFF, 1: ON)"),
+        Command("pdu_get_channel", (Arg("channel"),), "Get parameter of channel N"),
+        Command("pdu_get_buck", (Arg("buck"),), "Get parameter of Buck N"),
+        Command("pdu_get_all", (), "Get all parameters"),
+    ]),
+    ("CAM CMD", [
+        Command("cam_check_cam", (), "Check Camera connection"),
+        Command("cam_check_spec", (), "Check Spectrometer connection"),
+        Command("cam_set_cam_exp", (Arg("time_ms", 0),), "Set Camera exposure time, default 10"),
+        Command("cam_get_cam_exp", (), "Get current Camera exposure time"),
+        Command("cam_set_spec_exp", (Arg("time_ms", 0),), "Set Spectrometer exposure time, default 10"),
+        Command("cam_get_spec_exp", (), "Get current Spectrometer exposure time"),
+        Command("cam_set_routine", (Arg("time_ms", 0),), "Set routine interval time"),
+        Command("cam_get_routine", (), "Get current routine interval, default 1000"),
+        Command("cam_start_routine", (), "Start periodic routine"),
+        Command("cam_stop_routine", (), "Stop periodic routine"),
+        Command("cam_get_data", (), "Get CAM datapacket"),
+        Command("cam_get_img", (), "Get CAM datapacket"),
+    ]),
+    ("IOU CMD", [
+        Command("iou_set_temp", (Arg("channel"), Arg("temp")), "Set temperature of channel ->(250 mean 25.0Cel)"),
+        Command("iou_get_temp", (Arg("device", 0, 2), Arg("channel")),
+                "Response temperature of this channel ->(0: NTC, 1: 1Wire, 2: I2C-channel0)"),
+        Command("iou_temp_setpoint", (Arg("channel"),), "Response temperature set point of this channel"),
+        Command("iou_tec_ena", (Arg("channel"),), "Enable operation of this channel TEC"),
+        Command("iou_tec_dis", (Arg("channel"),), "Disable operation of this channel TEC"),
+        Command("iou_tec_ena_auto", (Arg("channel"),), "Enable auto control this channel TEC"),
+        Command("iou_tec_dis_auto", (Arg("channel"),), "Disable auto control this channel TEC"),
+        Command("iou_tec_set_output", (Arg("channel"), Arg("mode", 0, 1), Arg("vol")),
+                "Set output TEC Voltage (Channel) (0: Cool, 1: Heat) (150 mean 1.50)"),
+        Command("iou_tec_set_auto_vol", (Arg("channel"), Arg("vol")), "Automatically control TEC Voltage"),
+        Command("iou_tec_status", (), "Get TEC status data"),
+        Command("iou_ringled_setrgbw", (Arg("r", 0, 255), Arg("g", 0, 255), Arg("b", 0, 255), Arg("w", 0, 255)),
+                "Set display mode for RingLed (0-255)"),
+        Command("iou_ringled_getrgbw", (), "Get display mode of RingLed"),
+        Command("iou_get_accel", (), "Get Accelerometer-Gyroscope"),
+        Command("iou_get_press", (), "Get Pressure Sensor Data"),
+        Command("iou_irled_set_bri", (Arg("percent", 0, 100),), "Set brightness (0-100%) of IR led"),
+        Command("iou_irled_get_bri", (), "Get brightness (0-100%) of IR led"),
+        Command("iou_get_all", (), "Show all status of device in IOU board"),
+        Command("iou_auto_status", (), "Auto update status IOU"),
+    ]),
+]
+
+COMMANDS = {command.name: command for section, commands in CATALOG for command in commands}
+
+
+def usage(command):
+    # "set_byte_rs422 <size>", as the help listing shows it
+    return " ".join([command.name] + [f"<{arg.name}>" for arg in command.args])
+
+def arg_range(arg):
+    if arg.choices:
+        return f"one of {', '.join(map(str, arg.choices))}"
+    if arg.low is not None and arg.high is not None:
+        return f"{arg.low}..{arg.high}"
+    if arg.low is not None:
+        return f">= {arg.low}"
+    return "an integer"
+
+def check_arg(arg, text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise ValueError(f"<{arg.name}> must be an integer, got {text!r}")
+    if (arg.choices and value not in arg.choices) or (arg.low is not None and value < arg.low) \
+            or (arg.high is not None and value > arg.high):
+        raise ValueError(f"<{arg.name}> must be {arg_range(arg)}, got {value}")
+    return value
+
+def format_command(name, *values):
+    # Command line for the console with the arguments checked against the
+    # catalog, raises KeyError for an unknown command and ValueError for bad args
+    command = COMMANDS[name]
+    if len(values) != len(command.args):
+        raise ValueError(f"usage: {usage(command)}")
+    checked = [check_arg(arg, str(value)) for arg, value in zip(command.args, values)]
+    return " ".join([name] + [str(value) for value in checked])
+
+def check_command(line):
+    # Validates a typed line. Commands missing from the catalog pass unchanged,
+    # the firmware may know more than this list does.
+    parts = line.split()
+    if not parts or parts[0] not in COMMANDS:
+        return line
+    return format_command(*parts)
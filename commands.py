@@ -0,0 +1,138 @@
+import itertools
+import queue
+import re
+import time
+from collections import deque, namedtuple
+
+# The console prints its "> " prompt at the start of a line once a command has
+# finished, a response is everything from the write up to and including it
+PROMPT_RE = re.compile(r"(?m)^> ?")
+DEFAULT_TIMEOUT = 2.0
+
+# status is "ok" (expect matched), "timeout" (response holds whatever arrived)
+# or "sent" (no response expected). latency is seconds from the write.
+CommandResult = namedtuple("CommandResult", ["command_id", "command", "status", "response", "latency"])
+
+
+class PendingCommand:
+    def __init__(self, command_id, command, expect, timeout, pace):
+        self.command_id = command_id
+        self.command = command
+        self.expect = expect
+        self.timeout = timeout
+        self.pace = pace
+        self.sent_time = None
+        self.response = ""
+
+    def result(self, status, now):
+        return CommandResult(self.command_id, self.command, status, self.response, now - self.sent_time)
+
+
+class CommandQueue:
+    # Commands can be submitted from any thread, everything else runs on the
+    # thread that owns the port: service() writes queued commands while fewer
+    # than max_in_flight are waiting, feed() hands received text to the oldest
+    # command in flight and completes it once its expect pattern matches.
+    def __init__(self, max_in_flight=1, default_timeout=DEFAULT_TIMEOUT, prompt=PROMPT_RE):
+        self.max_in_flight = max_in_flight
+        self.default_timeout = default_timeout
+        self.prompt = prompt
+        self.submitted = queue.Queue()
+        self.urgent = queue.Queue()  # control bytes, written ahead of everything else
+        self.in_flight = deque()
+        self.ids = itertools.count(1)
+        self.next_command = None  # taken from submitted, waiting for its pace
+        self.last_done_time = 0.0
+
+    def submit(self, command, expect=True, timeout=None, pace=0.0, urgent=False):
+        # expect: True waits for the prompt, a pattern (str or compiled) waits
+        # for that instead, None completes as soon as the command is written.
+        # pace is the minimum gap in seconds after the previous command
+        # completed before this one is written. urgent is for control bytes
+        # like ESC: written on the next service() even while other commands
+        # wait for their response, expect and pace are ignored.
+        # Returns the id that comes back in the CommandResult.
+        if urgent:
+            command_id = next(self.ids)
+            self.urgent.put(PendingCommand(command_id, command, None, 0.0, 0.0))
+            return command_id
+        if expect is True:
+            expect = self.prompt
+        elif isinstance(expect, str):
+            expect = re.compile(expect)
+        command_id = next(self.ids)
+        self.submitted.put(PendingCommand(command_id, command, expect, timeout or self.default_timeout, pace))
+        return command_id
+
+    @property
+    def busy(self):
+        return bool(self.in_flight)
+
+    def pending(self):
+        return self.urgent.qsize() + self.submitted.qsize() + len(self.in_flight) + (self.next_command is not None)
+
+    def service(self, write, now=None):
+        # Times out the oldest command, then writes new ones with write(bytes).
+        # Returns the completed CommandResults.
+        now = time.monotonic() if now is None else now
+        results = []
+        while True:
+            try:
+                command = self.urgent.get_nowait()
+            except queue.Empty:
+                break
+            write(command.command.encode())
+            command.sent_time = now
+            results.append(command.result("sent", now))
+        while self.in_flight and now - self.in_flight[0].sent_time >= self.in_flight[0].timeout:
+            results.append(self.in_flight.popleft().result("timeout", now))
+            self.last_done_time = now
+        while len(self.in_flight) < self.max_in_flight:
+            if self.next_command is None:
+                try:
+                    self.next_command = self.submitted.get_nowait()
+                except queue.Empty:
+                    break
+            command = self.next_command
+            if command.pace and (self.in_flight or now - self.last_done_time < command.pace):
+                break
+            self.next_command = None
+            write(command.command.encode())
+            command.sent_time = now
+            if command.expect is None:
+                results.append(command.result("sent", now))
+                self.last_done_time = now
+            else:
+                self.in_flight.append(command)
+        return results
+
+    def feed(self, text, now=None):
+        now = time.monotonic() if now is None else now
+        results = []
+        while text and self.in_flight:
+            command = self.in_flight[0]
+            command.response += text
+            match = command.expect.search(command.response)
+            if match is None:
+                break
+            # Anything after the match belongs to the next command
+            text = command.response[match.end():]
+            command.response = command.response[:match.end()]
+            results.append(self.in_flight.popleft().result("ok", now))
+            self.last_done_time = now
+        return results
+
+    def clear(self):
+        # Drops everything, e.g. when the port closes. Returns the dropped ids.
+        dropped = [command.command_id for command in self.in_flight]
+        if self.next_command is not None:
+            dropped.append(self.next_command.command_id)
+            self.next_command = None
+        self.in_flight.clear()
+        for submitted in (self.urgent, self.submitted):
+            while True:
+                try:
+                    dropped.append(submitted.get_nowait().command_id)
+                except queue.Empty:
+                    break
+        return dropped
@@ -0,0 +1,217 @@
+import re
+from collections import namedtuple
+
+try:
+    from binascii import crc_hqx
+except ImportError:
+    crc_hqx = None
+
+FRAME_LENGTH = 284
+RS422_FRAME_LENGTH = FRAME_LENGTH - 2  # RS422 frames come without 0xCA/0xEF
+# Packet size range accepted by the firmware's set_byte_rs422 command
+RS422_FRAME_SIZE_MIN = 150
+RS422_FRAME_SIZE_MAX = 1000
+
+FRAME_DELIMITER_RE = re.compile(rb'[\xCA\xEF]')
+# 0xBD followed by anything but a known escape code, both bytes are dropped
+UNKNOWN_ESCAPE_RE = re.compile(rb'\xBD(?![\xDC\xDE\xDB])[\s\S]?')
+# Console output: printable ASCII, whitespace and ANSI escapes
+TEXT_RE = re.compile(rb'[\t\n\r\x1b\x20-\x7e]*')
+
+# data is the destuffed frame including the 0xCA/0xEF delimiters,
+# status is one of "ok", "crc_fail" or "length_fail"
+Frame = namedtuple("Frame", ["data", "status"])
+
+
+def _make_crc16_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = (crc << 1) ^ 0x1021
+            else:
+                crc <<= 1
+        table.append(crc & 0xFFFF)
+    return table
+
+CRC16_TABLE = _make_crc16_table()
+
+def calculate_crc16_table(data):
+    # CRC-16/XMODEM (poly 0x1021, init 0x0000), one table lookup per byte
+    crc = 0x0000
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+def calculate_crc16(data):
+    if crc_hqx is not None:
+        return crc_hqx(data, 0x0000)
+    return calculate_crc16_table(data)
+
+def destuff_frame(frame_data):
+    frame_data = bytes(frame_data)
+    escapes = frame_data.count(b'\xBD')
+    if not escapes:
+        return bytearray(frame_data)
+    valid_escapes = frame_data.count(b'\xBD\xDC') + frame_data.count(b'\xBD\xDE') + frame_data.count(b'\xBD\xDB')
+    if escapes != valid_escapes:
+        frame_data = UNKNOWN_ESCAPE_RE.sub(b'', frame_data)
+    # Every remaining 0xBD now starts a valid pair, 0xBD 0xDB goes last
+    # so the 0xBD it produces is not read as the start of another escape
+    frame_data = frame_data.replace(b'\xBD\xDC', b'\xCA').replace(b'\xBD\xDE', b'\xEF')
+    return bytearray(frame_data.replace(b'\xBD\xDB', b'\xBD'))
+
+def stuff_frame(frame_data):
+    # Inverse of destuff_frame, keeps the 0xCA/0xEF delimiters
+    body = bytes(frame_data[1:-1]).replace(b'\xBD', b'\xBD\xDB')
+    body = body.replace(b'\xCA', b'\xBD\xDC').replace(b'\xEF', b'\xBD\xDE')
+    return bytes(frame_data[:1]) + body + bytes(frame_data[-1:])
+
+def parse_set_byte_command(command):
+    # Returns the new RS422 packet size for a "set_byte_rs422 <size>" command, else None
+    parts = command.split()
+    if len(parts) != 2 or parts[0] != "set_byte_rs422" or not parts[1].isdigit():
+        return None
+    size = int(parts[1])
+    if not RS422_FRAME_SIZE_MIN <= size <= RS422_FRAME_SIZE_MAX:
+        return None
+    return size
+
+def check_crc(frame_data):
+    crc_received = (frame_data[-4] << 8) | frame_data[-3]
+    return crc_received == calculate_crc16(frame_data[2:-4])
+
+
+class FrameParser:
+    # Incremental framer for both link types, partial frames are kept
+    # across feed() calls so any chunking of the byte stream works
+    def __init__(self, is_rf_mode=True, resync=True, rs422_frame_size=RS422_FRAME_LENGTH, collect_text=False):
+        self.is_rf_mode = is_rf_mode
+        self.rs422_frame_size = rs422_frame_size
+        # RS422 only: on a CRC failure slide forward until a window validates
+        self.resync = resync
+        self.locked = False
+        self.discarded_bytes = 0
+        self.buffer = bytearray()
+        # RF only: keep the bytes between frames (command responses while auto
+        # report runs) for pop_text() instead of dropping them
+        self.collect_text = collect_text
+        self.text = bytearray()
+        self.text_taken = 0  # bytes at the start of buffer already copied to text
+
+    def set_mode(self, is_rf):
+        self.is_rf_mode = is_rf
+        self.reset()
+
+    def set_rs422_frame_size(self, size):
+        if not RS422_FRAME_SIZE_MIN <= size <= RS422_FRAME_SIZE_MAX:
+            raise ValueError(f"RS422 frame size must be {RS422_FRAME_SIZE_MIN}..{RS422_FRAME_SIZE_MAX}, got {size}")
+        self.rs422_frame_size = size
+        self.reset()
+
+    @property
+    def frame_length(self):
+        # Length of an "ok" frame as yielded by feed(), 0xCA/0xEF included
+        if self.is_rf_mode:
+            return FRAME_LENGTH
+        return self.rs422_frame_size + 2
+
+    def reset(self):
+        self.buffer = bytearray()
+        self.text = bytearray()
+        self.text_taken = 0
+        self.locked = False
+
+    def pop_text(self):
+        text = bytes(self.text)
+        self.text = bytearray()
+        return text
+
+    def feed(self, data):
+        if self.is_rf_mode:
+            return self.feed_rf(data)
+        return self.feed_rs422(data)
+
+    def feed_rf(self, data):
+        pos = 0
+        for match in FRAME_DELIMITER_RE.finditer(data):
+            index = match.start()
+            if data[index] == 0xCA:  # Start of frame
+                if self.collect_text and self.buffer[:1] != b'\xCA':
+                    # Everything since the last 0xEF was between frames
+                    self.text += self.buffer[self.text_taken:]
+                    self.text += data[pos:index]
+                self.buffer = bytearray(data[index:index + 1])
+                self.text_taken = 0
+            else:  # End of frame
+                self.buffer.extend(data[pos:index + 1])
+                frame_data = destuff_frame(self.buffer)
+                self.buffer = bytearray()
+                self.text_taken = 0
+                if len(frame_data) != FRAME_LENGTH:
+                    yield Frame(frame_data, "length_fail")
+                elif not check_crc(frame_data):
+                    yield Frame(frame_data, "crc_fail")
+                else:
+                    yield Frame(frame_data, "ok")
+            pos = index + 1
+        self.buffer.extend(data[pos:])
+        if self.collect_text and self.buffer[:1] != b'\xCA':
+            self.take_text()
+
+    def take_text(self):
+        # Bytes since the last 0xEF stay in the buffer, so a lone 0xEF still
+        # makes them a length_fail frame. Printable ones are copied to text
+        # right away, anything else waits for an 0xCA to show it was text.
+        end = TEXT_RE.match(self.buffer, self.text_taken).end()
+        self.text += self.buffer[self.text_taken:end]
+        self.text_taken = end
+
+    def feed_rs422(self, data):
+        self.buffer.extend(data)
+        while len(self.buffer) >= self.rs422_frame_size:
+            if self.check_rs422_window(0):
+                self.locked = True
+                yield Frame(self.take_rs422_frame(), "ok")
+                continue
+            if not self.resync:
+                yield Frame(self.take_rs422_frame(), "crc_fail")
+                continue
+            if self.locked:
+                # Report the frame that broke the lock once, then hunt for the next one
+                self.locked = False
+                yield Frame(self.peek_rs422_frame(), "crc_fail")
+            offset = self.find_rs422_frame(1)
+            if offset is None:
+                # Keep the tail, a frame may start in it once more bytes arrive
+                self.discard(len(self.buffer) - self.rs422_frame_size + 1)
+                break
+            self.discard(offset)
+
+    def check_rs422_window(self, offset):
+        # Same check as check_crc() on the frame with 0xCA/0xEF added around it
+        end = offset + self.rs422_frame_size
+        crc_received = (self.buffer[end - 3] << 8) | self.buffer[end - 2]
+        return crc_received == calculate_crc16(self.buffer[offset + 1:end - 3])
+
+    def find_rs422_frame(self, start):
+        for offset in range(start, len(self.buffer) - self.rs422_frame_size + 1):
+            if self.check_rs422_window(offset):
+                return offset
+        return None
+
+    def peek_rs422_frame(self):
+        frame_data = bytearray(b'\xCA')  # Add 0xCA at the beginning
+        frame_data.extend(self.buffer[:self.rs422_frame_size])
+        frame_data.append(0xEF)
+        return frame_data
+
+    def take_rs422_frame(self):
+        frame_data = self.peek_rs422_frame()
+        del self.buffer[:self.rs422_frame_size]
+        return frame_data
+
+    def discard(self, count):
+        del self.buffer[:count]
+        self.discarded_bytes += count
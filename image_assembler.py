@@ -0,0 +1,126 @@
+import time
+from collections import namedtuple
+
+from frame_parser import FRAME_LENGTH
+
+# Image frames carry their sequence number in data[2] (0x00..0x1A) and
+# data[3:-3] as the payload, 278 bytes in a 284 byte RF frame
+IMAGE_CHUNKS = 27
+IMAGE_OVERHEAD = 6
+IMAGE_TIMEOUT = 5.0  # seconds without a chunk before an incomplete image is written
+
+# missing and suspect (kept from a CRC failed frame) are sequence numbers,
+# latency is seconds from the first chunk to the write
+ImageReport = namedtuple("ImageReport", ["path", "received", "expected", "missing", "suspect", "duplicates", "latency", "size"])
+
+
+class ImageAssembler:
+    # Puts chunk n at n * chunk_size of one preallocated buffer and hands the
+    # image to write_file(path, data) in one piece once every chunk is in, a
+    # new image starts (sequence 0, or a sequence that is already filled) or
+    # nothing has arrived for timeout seconds. Missing chunks stay zero so the
+    # payload keeps its offsets. A chunk from a CRC failed frame only fills an
+    # empty slot, is listed as suspect and never starts a new image.
+    def __init__(self, write_file, chunk_size=FRAME_LENGTH - IMAGE_OVERHEAD, chunks=IMAGE_CHUNKS, timeout=IMAGE_TIMEOUT):
+        self.write_file = write_file
+        self.chunks = chunks
+        self.timeout = timeout
+        self.last_name = None
+        self.name_count = 0
+        self.images = 0
+        self.complete_images = 0
+        self.invalid_chunks = 0
+        self.last_report = None
+        self.set_chunk_size(chunk_size)
+
+    def set_chunk_size(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.buffer = bytearray(chunk_size * self.chunks)
+        self.blank = bytes(len(self.buffer))
+        self.start_image()
+
+    def start_image(self):
+        self.status = [None] * self.chunks  # None, "ok" or "crc_fail" per sequence
+        self.received = 0
+        self.duplicates = 0
+        self.start_time = None
+        self.wall_start = None
+        self.last_time = None
+
+    def add(self, data, status, now=None):
+        # data is a whole image frame. Returns the ImageReports of the images
+        # written because of it.
+        now = time.monotonic() if now is None else now
+        reports = []
+        sequence = data[2]
+        if sequence >= self.chunks:
+            self.invalid_chunks += 1
+            return reports
+        if len(data) - IMAGE_OVERHEAD != self.chunk_size:
+            reports += self.flush(now)
+            self.set_chunk_size(len(data) - IMAGE_OVERHEAD)
+        elif status == "ok" and self.received and (sequence == 0 or self.status[sequence] == "ok"):
+            reports += self.flush(now)
+
+        previous = self.status[sequence]
+        if previous is not None and status != "ok":
+            self.duplicates += 1
+            return reports
+        if previous is None:
+            self.received += 1
+        offset = sequence * self.chunk_size
+        self.buffer[offset:offset + self.chunk_size] = memoryview(data)[3:-3]
+        self.status[sequence] = "ok" if status == "ok" else "crc_fail"
+        if self.start_time is None:
+            self.start_time = now
+            self.wall_start = time.time()
+        self.last_time = now
+
+        if self.received == self.chunks and "crc_fail" not in self.status:
+            reports += self.flush(now)
+        return reports
+
+    def poll(self, now=None):
+        # Writes an image that stopped receiving chunks, call this periodically
+        now = time.monotonic() if now is None else now
+        if self.received and now - self.last_time >= self.timeout:
+            return self.flush(now)
+        return []
+
+    def flush(self, now=None):
+        # Writes whatever has arrived, e.g. when the collection stops
+        if not self.received:
+            return []
+        now = time.monotonic() if now is None else now
+        path = self.image_path()
+        self.write_file(path, bytes(self.buffer))
+        missing = [sequence for sequence, status in enumerate(self.status) if status is None]
+        suspect = [sequence for sequence, status in enumerate(self.status) if status == "crc_fail"]
+        report = ImageReport(path, self.received - len(suspect), self.chunks, missing, suspect,
+                             self.duplicates, now - self.start_time, len(self.buffer))
+        self.images += 1
+        if not missing and not suspect:
+            self.complete_images += 1
+        self.last_report = report
+        self.buffer[:] = self.blank
+        self.start_image()
+        return [report]
+
+    def image_path(self):
+        # HH_MM_SS_img.txt from the first chunk, numbered when a second image starts in the same second
+        name = time.strftime("%H_%M_%S", time.localtime(self.wall_start))
+        if name == self.last_name:
+            self.name_count += 1
+            return f"{name}_img_{self.name_count}.txt"
+        self.last_name = name
+        self.name_count = 1
+        return f"{name}_img.txt"
+
+
+def format_image_report(report):
+    text = f"{report.received}/{report.expected} in {report.latency:.1f} s"
+    if report.missing:
+        text += f", missing {','.join(map(str, report.missing))}"
+    if report.suspect:
+        text += f", CRC {','.join(map(str, report.suspect))}"
+    return text
@@ -0,0 +1,183 @@
+import os
+import queue
+import threading
+import time
+
+
+class QueuedFile:
+    # File-like handle whose open/write/close run on the LogWriter thread
+    def __init__(self, writer, path, mode):
+        self.writer = writer
+        self.path = path
+        self.mode = mode
+        self.file = None  # only touched by the writer thread
+
+    def write(self, data):
+        # False when the write was dropped because the queue is full
+        return self.writer.put(("write", self, data, time.monotonic()))
+
+    def flush(self):
+        # Flushing follows the writer's time/size policy, durable mode syncs every write
+        pass
+
+    def close(self):
+        self.writer.put(("close", self, None, time.monotonic()), control=True)
+
+
+class LogWriter(threading.Thread):
+    # Owns every log file so disk stalls never block the GUI thread. Writes are
+    # dropped (and counted) once max_queue items are waiting, open/close/stop
+    # are always queued so no file is leaked. In durable mode a full queue
+    # blocks the caller instead, except on the main (GUI) thread, which never
+    # waits for the disk: it may queue durable_factor times more before its
+    # writes are dropped and counted.
+    def __init__(self, max_queue=10000, flush_interval=1.0, flush_bytes=65536, durable=False, durable_factor=10):
+        super().__init__(daemon=True)
+        self.queue = queue.Queue()
+        self.room = threading.Condition()  # notified whenever the writer takes an item
+        self.max_queue = max_queue
+        self.durable_factor = durable_factor
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        # fsync after every write, for operators who can't afford to lose a frame
+        self.durable = durable
+        self.files = []
+        self.pending_bytes = 0
+        self.last_flush = time.monotonic()
+        self.stopped = False
+
+        self.max_queue_depth = 0
+        self.written_items = 0
+        self.dropped_items = 0
+        self.blocked_time = 0.0
+        self.bytes_written = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def open(self, path, mode="w"):
+        handle = QueuedFile(self, path, mode)
+        self.put(("open", handle, None, time.monotonic()), control=True)
+        return handle
+
+    def write_file(self, path, data):
+        # Whole file in one write, through a temporary file and a rename so a
+        # reader never sees it half written. Control item, never dropped.
+        self.put(("write_file", QueuedFile(self, path, "wb"), bytes(data), time.monotonic()), control=True)
+
+    def put(self, item, control=False):
+        if self.stopped:
+            return False
+        depth = self.queue.qsize()
+        if not control and depth >= self.max_queue:
+            if not self.durable:
+                self.dropped_items += 1
+                return False
+            if threading.current_thread() is threading.main_thread():
+                if depth >= self.max_queue * self.durable_factor:
+                    self.dropped_items += 1
+                    return False
+            elif not self.wait_for_room():
+                return False
+            depth = self.queue.qsize()
+        self.queue.put(item)
+        self.max_queue_depth = max(self.max_queue_depth, depth + 1)
+        return True
+
+    def wait_for_room(self):
+        # Durable mode on a worker thread, False if the writer stopped meanwhile
+        blocked_at = time.monotonic()
+        with self.room:
+            while self.queue.qsize() >= self.max_queue and not self.stopped:
+                self.room.wait(self.flush_interval)
+        self.blocked_time += time.monotonic() - blocked_at
+        return not self.stopped
+
+    def stop(self):
+        if not self.stopped:
+            self.queue.put(("stop", None, None, time.monotonic()))
+            self.stopped = True
+        with self.room:
+            self.room.notify_all()
+        self.join()
+
+    def stats(self):
+        written = max(self.written_items, 1)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "written_items": self.written_items,
+            "dropped_items": self.dropped_items,
+            "blocked_ms": self.blocked_time * 1000,
+            "bytes_written": self.bytes_written,
+            "mean_latency_ms": self.total_latency / written * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+    def run(self):
+        while True:
+            try:
+                op, handle, data, queued_at = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self.flush_all()
+                continue
+            with self.room:
+                self.room.notify_all()
+            try:
+                if op == "stop":
+                    for handle in list(self.files):
+                        self.close_file(handle)
+                    return
+                self.apply(op, handle, data)
+            except OSError as e:
+                print(f"Error writing log {handle.path}: {str(e)}")
+            latency = time.monotonic() - queued_at
+            self.written_items += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if self.pending_bytes >= self.flush_bytes or time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush_all()
+
+    def apply(self, op, handle, data):
+        if op == "write_file":
+            self.replace_file(handle.path, data)
+        elif op == "open":
+            handle.file = open(handle.path, handle.mode)
+            self.files.append(handle)
+        elif handle.file is None:
+            return  # open failed, already reported
+        elif op == "write":
+            handle.file.write(data)
+            self.bytes_written += len(data)
+            self.pending_bytes += len(data)
+            if self.durable:
+                self.sync(handle)
+        elif op == "close":
+            self.close_file(handle)
+
+    def replace_file(self, path, data):
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+            if self.durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        self.bytes_written += len(data)
+
+    def sync(self, handle):
+        handle.file.flush()
+        os.fsync(handle.file.fileno())
+
+    def close_file(self, handle):
+        handle.file.close()
+        handle.file = None
+        self.files.remove(handle)
+
+    def flush_all(self):
+        for handle in self.files:
+            try:
+                handle.file.flush()
+            except OSError as e:
+                print(f"Error writing log {handle.path}: {str(e)}")
+        self.pending_bytes = 0
+        self.last_flush = time.monotonic()
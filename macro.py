@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import serial
+
+from command_catalog import check_command
+from commands import CommandQueue
+from frame_parser import FrameParser
+
+DEFAULT_PACE = 0.1  # seconds between a response and the next command
+
+# Built-in sequences, one console command per step
+MACROS = {
+    "pmu_sweep": ["pmu_get_temp", "pmu_bat_vol", "pmu_parag_in", "pmu_parag_out", "pmu_get_all"],
+    "pdu_sweep": ["pdu_get_all"],
+    "iou_sweep": ["iou_get_all", "iou_tec_status", "iou_get_accel", "iou_get_press", "iou_ringled_getrgbw", "iou_irled_get_bri"],
+    "cam_sweep": ["cam_check_cam", "cam_check_spec", "cam_get_cam_exp", "cam_get_spec_exp", "cam_get_routine"],
+}
+MACROS["health_sweep"] = (["status_now", "memory_usage", "time_get"] + MACROS["pmu_sweep"]
+                          + MACROS["pdu_sweep"] + MACROS["iou_sweep"])
+
+# "Name: 12.5" or "Name = -3" anywhere in a response line
+VALUE_RE = re.compile(r"([A-Za-z][\w .°/%()-]*?)\s*[:=]\s*(-?\d+(?:\.\d+)?)(?![\w.])")
+
+
+def load_macro(path):
+    # One command per line, blank lines and # comments are skipped
+    with open(path, encoding="utf-8") as f:
+        steps = [line.split("#", 1)[0].strip() for line in f]
+    return [step for step in steps if step]
+
+def response_lines(result):
+    # The response without the echoed command and the trailing prompt
+    lines = [line.rstrip() for line in result.response.splitlines()]
+    if lines and lines[0].strip() == result.command.strip():
+        lines = lines[1:]
+    while lines and lines[-1].strip() in ("", ">"):
+        lines.pop()
+    return lines
+
+def parse_values(lines):
+    values = {}
+    for line in lines:
+        for name, value in VALUE_RE.findall(line):
+            values[name.strip()] = float(value) if "." in value else int(value)
+    return values
+
+
+class MacroRun:
+    # One pass over a macro: start() queues every step through submit (a
+    # CommandQueue.submit or SerialThread.submit_command), handle_result()
+    # takes the CommandResults until done. Steps are checked against the
+    # command catalog up front, ValueError if one is malformed.
+    def __init__(self, name, steps, pace=DEFAULT_PACE, timeout=None):
+        self.name = name
+        self.steps = [check_command(step) for step in steps]
+        self.pace = pace
+        self.timeout = timeout
+        self.ids = []
+        self.results = {}
+        self.start_time = None
+        self.wall_start = None
+        self.end_time = None
+
+    def start(self, submit):
+        self.start_time = time.monotonic()
+        self.wall_start = time.time()
+        self.ids = [submit(step + "\n", True, self.timeout, self.pace) for step in self.steps]
+
+    @property
+    def done(self):
+        return self.end_time is not None
+
+    def handle_result(self, result):
+        # Returns False for results that belong to someone else
+        if result.command_id not in self.ids:
+            return False
+        self.results[result.command_id] = result
+        if len(self.results) == len(self.ids):
+            self.end_time = time.monotonic()
+        return True
+
+    def report(self):
+        steps = []
+        for command_id in self.ids:
+            result = self.results.get(command_id)
+            if result is None:
+                continue  # never answered, e.g. the port closed
+            lines = response_lines(result)
+            steps.append({
+                "command": result.command.strip(),
+                "status": result.status,
+                "latency_ms": round(result.latency * 1000, 1),
+                "lines": lines,
+                "values": parse_values(lines),
+            })
+        end_time = self.end_time if self.end_time is not None else time.monotonic()
+        return {
+            "macro": self.name,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.wall_start)),
+            "elapsed_s": round(end_time - self.start_time, 3),
+            "pace_s": self.pace,
+            "commands": len(self.ids),
+            "ok": sum(step["status"] == "ok" for step in steps),
+            "timeouts": sum(step["status"] == "timeout" for step in steps),
+            "steps": steps,
+        }
+
+    def summary(self):
+        report = self.report()
+        return (f"Macro {self.name}: {report['ok']}/{report['commands']} ok, "
+                f"{report['timeouts']} timed out in {report['elapsed_s']:.1f} s")
+
+
+def run_macro(port, run, queue=None):
+    # Drives a MacroRun on an open port without Qt. Text between RF frames is
+    # kept, so this works with auto report on in RF mode.
+    queue = queue or CommandQueue()
+    parser = FrameParser(collect_text=True)
+    run.start(queue.submit)
+    while not run.done:
+        for result in queue.service(port.write):
+            run.handle_result(result)
+        data = port.read(min(max(port.in_waiting, 1), 4096))
+        if data:
+            # Only the text between frames is wanted here
+            for frame in parser.feed(data):
+                pass
+            for result in queue.feed(parser.pop_text().decode("latin-1")):
+                run.handle_result(result)
+    return run.report()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a command sequence on the board and report the responses")
+    parser.add_argument("port", nargs="?", help="serial port (COM5, /dev/ttyUSB0) or any pyserial URL")
+    parser.add_argument("macro", nargs="?", default="health_sweep", help=f"built-in macro: {', '.join(MACROS)}")
+    parser.add_argument("--file", help="macro file, one command per line, instead of a built-in")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--pace", type=float, default=DEFAULT_PACE, help="seconds between a response and the next command")
+    parser.add_argument("--timeout", type=float, help="seconds to wait for each prompt")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--list", action="store_true", help="list the built-in macros and exit")
+    args = parser.parse_args()
+
+    if args.list or args.port is None:
+        for name, steps in MACROS.items():
+            print(f"{name}: {', '.join(steps)}")
+        return
+    if args.file:
+        name, steps = os.path.splitext(os.path.basename(args.file))[0], load_macro(args.file)
+    elif args.macro in MACROS:
+        name, steps = args.macro, MACROS[args.macro]
+    else:
+        parser.error(f"unknown macro {args.macro}")
+    try:
+        run = MacroRun(name, steps, args.pace, args.timeout)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with serial.serial_for_url(args.port, baudrate=args.baud, timeout=0.05) as port:
+        report = run_macro(port, run)
+    for step in report["steps"]:
+        print(f"{step['status']:>7} {step['latency_ms']:>8.1f} ms  {step['command']}", file=sys.stderr)
+    print(run.summary(), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,107 @@
 import sys
+import json
+import os
+import queue
 import serial
 import time
-import struct
-import folium
-from PyQt6.QtWidgets import QApplication, QMainWindow, QComboBox, QPushButton, QTextEdit, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QMessageBox, QLineEdit, QGroupBox, QGridLayout, QFrame, QScrollArea, QSplashScreen
-from PyQt6.QtCore import QThread, pyqtSignal, QUrl, QTimer
-from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtWidgets import QApplication, QMainWindow, QComboBox, QPushButton, QTextEdit, QPlainTextEdit, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QMessageBox, QLineEdit, QGroupBox, QGridLayout, QFrame, QScrollArea, QSplashScreen, QCheckBox, QFileDialog
+from PyQt6.QtCore import QThread, pyqtSignal, QUrl, QTimer, QCoreApplication
 from PyQt6.QtWidgets import QSplitter, QGridLayout, QSizePolicy
 from PyQt6.QtCore import QSize, Qt
 from PyQt6.QtGui import QTextCursor, QFont, QPixmap, QIcon
 from datetime import datetime
 
+from frame_parser import FRAME_LENGTH, RS422_FRAME_LENGTH, FrameParser, parse_set_byte_command
+from binlog import BinaryLogWriter, format_frame_text
+from capture import CaptureWriter
+from command_catalog import CATALOG, arg_range, check_command, usage
+from commands import CommandQueue
+from image_assembler import ImageAssembler, format_image_report
+from log_writer import LogWriter
+from macro import MACROS, MacroRun, load_macro
+from replay import REPLAY_PREFIX, ReplayPort, is_replay_url
+from session import SessionWriter
+from track import TrackDecimator, TrackStore
+from telemetry import FIELDS_BY_NAME, PDU_CHANNELS, PMU_CHANNELS, decode_gps, decode_telemetry, format_value
+
+# Order of the "Value Received" grid, four parameters per row
+PARAM_LAYOUT = [
+    "Time", "Date", "RGBW", "---",
+    "t°NTC CH0", "t°NTC CH1", "t°NTC CH2", "t°NTC CH3",
+    "t°1Wire CH0", "t°1Wire CH1", "t°Sensor", "",
+    "SetPoint CH0", "SetPoint CH1", "SetPoint CH2", "SetPoint CH3",
+    "Vol TEC0", "Vol TEC1", "Vol TEC2", "Vol TEC3",
+    "irLED", "aX", "aY", "aZ", "Press", "gX", "gY", "gZ", "---",
+]
+for status_name, value_name, unit in PDU_CHANNELS:
+    PARAM_LAYOUT += [status_name, value_name]
+PARAM_LAYOUT.append("---")
+PARAM_LAYOUT += [name for name, unit in PMU_CHANNELS]
+
+# The map (QtWebEngine and folium) is only loaded at the first GPS fix, importing
+# QtWebEngineWidgets after the QApplication exists needs this set beforehand
+QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+
+# Bypass text held in SerialThread beyond this is sent on even without a newline
+TEXT_BUFFER_LIMIT = 4096
+
+# Lines kept in the Terminal and GPS panes, older lines are dropped
+TERMINAL_MAX_LINES = 5000
+GPS_MAX_LINES = 3000
+
+# Run in the map page once it has loaded, GPS fixes are then pushed with
+# addTrackPoints() instead of re-rendering the folium HTML. MAP is replaced
+# by the folium map variable.
+TRACK_SCRIPT = """
+var trackLine = L.polyline([], {color: "red", weight: 3}).addTo(MAP);
+var trackPosition = null;
+function addTrackPoints(points) {
+    for (var i = 0; i < points.length; i++) {
+        trackLine.addLatLng(points[i]);
+    }
+    var last = trackLine.getLatLngs().slice(-1)[0];
+    if (last === undefined) {
+        return;
+    }
+    if (trackPosition === null) {
+        trackPosition = L.marker(last).addTo(MAP);
+    } else {
+        trackPosition.setLatLng(last);
+    }
+    if (!MAP.getBounds().contains(last)) {
+        MAP.panTo(last);
+    }
+}
+function setTrack(points) {
+    trackLine.setLatLngs(points);
+    addTrackPoints([]);
+}
+function clearTrack() {
+    trackLine.setLatLngs([]);
+    if (trackPosition !== null) {
+        MAP.removeLayer(trackPosition);
+        trackPosition = null;
+    }
+}
+"""
+
 class SerialThread(QThread):
     data_received = pyqtSignal(int, bytearray, str)  
-    data_received_bypass = pyqtSignal(int, bytes, str)
+    text_received = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
     crc_failed = pyqtSignal()
     frame_error = pyqtSignal()
+    bytes_discarded = pyqtSignal(int)
+    frames_received = pyqtSignal(list, dict)
+    command_completed = pyqtSignal(object)
+    rs422_frame_size_changed = pyqtSignal(int)
 
     def set_mode(self, is_rf):
+        # The parser belongs to this thread, run() applies the change between reads
         self.is_rf_mode = is_rf
+        self.parser_changes.put(is_rf)
 
-    def __init__(self, serial_port, baud_rate):
+    def __init__(self, serial_port, baud_rate, read_chunk_size=4096, rs422_frame_size=RS422_FRAME_LENGTH, batch_interval=None, replay_speed=1.0, capture=None, text_interval=0.05):
         super().__init__()
         self.serial_port_name = serial_port
         self.baud_rate = baud_rate
@@ -29,66 +109,162 @@ class SerialThread(QThread):
         self.serial_port = None
         self.auto_report_enabled = True 
         self.is_rf_mode = True 
+        self.parser = FrameParser(self.is_rf_mode, rs422_frame_size=rs422_frame_size, collect_text=True)
+        # set_mode()/clear_buffer() requests from the GUI: a mode, or None to reset
+        self.parser_changes = queue.Queue()
+        # Commands are written from this thread and matched to their responses,
+        # submit_command() is safe to call from the GUI
+        self.commands = CommandQueue()
+        # Max bytes pulled per read() call, 1 falls back to the old byte-by-byte mode
+        self.read_chunk_size = read_chunk_size
+        # Seconds between frames_received batches, None emits every frame on its own
+        self.batch_interval = batch_interval
+        self.pending_frames = []
+        self.pending_counters = self.new_counters()
+        self.last_batch_time = time.monotonic()
+        # Playback speed for replay:// ports, 0 replays as fast as possible
+        self.replay_speed = replay_speed
+        # CaptureWriter that gets every chunk read from the port, before framing
+        self.capture = capture
+        # With auto report off the bytes are command responses: complete lines go
+        # out as text at most every text_interval seconds, a trailing partial line
+        # (e.g. a prompt) once nothing has arrived for text_interval
+        self.text_interval = text_interval
+        self.text_buffer = bytearray()
+        self.last_text_time = time.monotonic()
+        self.last_text_byte_time = time.monotonic()
 
     def clear_buffer(self):
-        self.buffer = bytearray()
+        self.parser_changes.put(None)
+
+    def apply_parser_changes(self):
+        while True:
+            try:
+                is_rf = self.parser_changes.get_nowait()
+            except queue.Empty:
+                return
+            if is_rf is None:
+                self.parser.reset()
+            else:
+                self.parser.set_mode(is_rf)
+
+    def write_command(self, data):
+        self.serial_port.write(data)
+        # Auto report switches with the write, bytes before it are still read the old way
+        if data == b'\x1b':
+            self.auto_report_enabled = False
+        elif data.strip() == b'rs422_report_ena':
+            self.auto_report_enabled = True
+        # The parser only takes the new RS422 size here, on this thread and once
+        # the firmware has the command, frames already on the way keep the old one
+        frame_size = parse_set_byte_command(data.decode("latin-1"))
+        if frame_size is not None:
+            # Batched frames of the old size reach the GUI before it switches lengths
+            if self.batch_interval:
+                self.flush_batch()
+            self.parser.set_rs422_frame_size(frame_size)
+            self.rs422_frame_size_changed.emit(frame_size)
+
+    def submit_command(self, command, expect=True, timeout=None, pace=0.0, urgent=False):
+        return self.commands.submit(command, expect, timeout, pace, urgent)
 
     def run(self):
         try:
-            self.serial_port = serial.Serial(self.serial_port_name, baudrate=self.baud_rate, timeout=1)
+            # Wake up at least once per batch/text interval so an idle link still
+            # flushes and queued commands go out
+            timeout = min(interval for interval in (1, self.batch_interval, self.text_interval) if interval)
+            if is_replay_url(self.serial_port_name):
+                self.serial_port = ReplayPort.from_url(self.serial_port_name, self.is_rf_mode, self.baud_rate, self.replay_speed, timeout)
+            else:
+                self.serial_port = serial.serial_for_url(self.serial_port_name, baudrate=self.baud_rate, timeout=timeout)
             self.running = True
 
             self.serial_port.write(b'B')
 
-            self.buffer = bytearray()
+            self.parser.reset()
             while self.running:
-                data = self.serial_port.read()
+                self.apply_parser_changes()
+                # Block for the first byte, then take whatever is already waiting
+                size = min(max(self.serial_port.in_waiting, 1), self.read_chunk_size)
+                data = self.serial_port.read(size)
                 if data:
+                    if self.capture is not None:
+                        self.capture.write(data)
                     if self.auto_report_enabled:
-                        if self.is_rf_mode:
-                            if data[0] == 0xCA:  # Start of frame
-                                self.buffer = bytearray(data)
-                            elif data[0] == 0xEF:  # End of frame
-                                self.buffer.extend(data)
-                                frame_data = self.destuff_frame(self.buffer)
-                                if len(frame_data) != 284:
-                                    self.frame_error.emit()
-                                    self.data_received.emit(len(frame_data), frame_data, "length_fail") 
-                                else:
-                                    crc_received = (frame_data[-4] << 8) | frame_data[-3]
-                                    crc_calculated = self.calculate_crc(frame_data[2:-4])
-                                    if crc_received != crc_calculated:
-                                        self.crc_failed.emit()
-                                        self.data_received.emit(len(frame_data), frame_data, "crc_fail") 
-                                    else:
-                                        self.data_received.emit(len(frame_data), frame_data, "ok")  
-                                self.buffer = bytearray()
-                            else:
-                                self.buffer.extend(data)
-                        else:  # RS422 mode
-                            self.buffer.extend(data)
-                            if len(self.buffer) == 282:
-                                self.buffer.insert(0, 0xCA)  # Add 0xCA at the beginning
-                                self.buffer.append(0xEF)
-                                frame_data = self.buffer
-                                crc_received = (frame_data[-4] << 8) | frame_data[-3]
-                                crc_calculated = self.calculate_crc(frame_data[2:-4])
-                                if crc_received != crc_calculated:
-                                    self.crc_failed.emit()
-                                    self.data_received.emit(len(frame_data), frame_data, "crc_fail") 
-                                else:
-                                    self.data_received.emit(len(frame_data), frame_data, "ok")  
-                                self.buffer = bytearray()
-
+                        self.process_frames(data)
+                        # Text between frames is only shown when a command waits for it
+                        text = self.parser.pop_text()
+                        if text and self.commands.busy:
+                            self.receive_text(text)
                     else:
-                        self.data_received_bypass.emit(1, data, "ok")  
+                        self.receive_text(data)
+                elif getattr(self.serial_port, "exhausted", False):
+                    break  # end of the replayed recording
+                for result in self.commands.service(self.write_command):
+                    self.command_completed.emit(result)
+                if self.text_buffer:
+                    self.flush_text()
+                if self.batch_interval and time.monotonic() - self.last_batch_time >= self.batch_interval:
+                    self.flush_batch()
         except serial.SerialException as e:
             print("Serial Error") 
             self.error_occurred.emit(str(e))
         finally:
+            if self.batch_interval:
+                self.flush_batch()
+            self.flush_text(force=True)
+            self.commands.clear()
             if self.serial_port is not None and self.serial_port.is_open:
                 self.serial_port.close()
 
+    def process_frames(self, data):
+        discarded_bytes = self.parser.discarded_bytes
+        for frame in self.parser.feed(data):
+            if self.batch_interval:
+                self.pending_frames.append(frame)
+                self.pending_counters[frame.status] += 1
+                continue
+            if frame.status == "length_fail":
+                self.frame_error.emit()
+            elif frame.status == "crc_fail":
+                self.crc_failed.emit()
+            self.data_received.emit(len(frame.data), frame.data, frame.status)
+        discarded_bytes = self.parser.discarded_bytes - discarded_bytes
+        if discarded_bytes and self.batch_interval:
+            self.pending_counters["discarded_bytes"] += discarded_bytes
+        elif discarded_bytes:
+            self.bytes_discarded.emit(discarded_bytes)
+
+    def receive_text(self, data):
+        self.text_buffer += data
+        self.last_text_byte_time = time.monotonic()
+        for result in self.commands.feed(bytes(data).decode("latin-1")):
+            self.command_completed.emit(result)
+
+    def new_counters(self):
+        return {"ok": 0, "crc_fail": 0, "length_fail": 0, "discarded_bytes": 0}
+
+    def flush_batch(self):
+        self.last_batch_time = time.monotonic()
+        if self.pending_frames or self.pending_counters["discarded_bytes"]:
+            frames, counters = self.pending_frames, self.pending_counters
+            self.pending_frames = []
+            self.pending_counters = self.new_counters()
+            self.frames_received.emit(frames, counters)
+
+    def flush_text(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_text_time < self.text_interval:
+            return
+        if force or now - self.last_text_byte_time >= self.text_interval or len(self.text_buffer) >= TEXT_BUFFER_LIMIT:
+            end = len(self.text_buffer)
+        else:
+            end = self.text_buffer.rfind(b'\n') + 1
+        if end:
+            self.text_received.emit(bytes(self.text_buffer[:end]).decode("latin-1"))
+            del self.text_buffer[:end]
+            self.last_text_time = now
+
     def stop(self):
         self.running = False
         if self.serial_port is not None and self.serial_port.is_open:
@@ -97,35 +273,6 @@ class SerialThread(QThread):
     def set_auto_report(self, enabled):
         self.auto_report_enabled = enabled
 
-    def destuff_frame(self, frame_data):
-        destuffed_data = bytearray()
-        escape_received = False
-        for byte in frame_data:
-            if escape_received:
-                if byte == 0xDC:
-                    destuffed_data.append(0xCA)
-                elif byte == 0xDE:
-                    destuffed_data.append(0xEF)
-                elif byte == 0xDB:
-                    destuffed_data.append(0xBD)
-                escape_received = False
-            elif byte == 0xBD:
-                escape_received = True
-            else:
-                destuffed_data.append(byte)
-        return destuffed_data
-
-    def calculate_crc(self, data):
-        crc = 0x0000
-        for byte in data:
-            crc ^= byte << 8
-            for _ in range(8):
-                if crc & 0x8000:
-                    crc = (crc << 1) ^ 0x1021
-                else:
-                    crc <<= 1
-        return crc & 0xFFFF
-
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -135,7 +282,9 @@ class MainWindow(QMainWindow):
 
         self.auto_report_enabled = True
         self.is_rf_mode = True
-        self.history_count = 0
+        self.rs422_frame_size = RS422_FRAME_LENGTH
+        # Frames are delivered from the serial thread in batches this many seconds apart
+        self.batch_interval = 0.05
 
         self.clock_label = QLabel()
         self.clock_label.setStyleSheet("font-size: 11pt; font-weight: bold;")
@@ -144,10 +293,25 @@ class MainWindow(QMainWindow):
         self.timer.start(1000)
         self.update_clock()
 
+        # Labels, parameter grid, GPS text and map are refreshed at most once per
+        # render_interval ms, 0 refreshes on every frame
+        self.render_interval = 100
+        self.labels_dirty = False
+        self.pending_telemetry = None
+        self.render_timer = QTimer(self)
+        self.render_timer.timeout.connect(self.render_tick)
+        if self.render_interval:
+            self.render_timer.start(self.render_interval)
+
         self.com_port_combo = QComboBox()
         self.com_port_combo.addItems(["COM1", "COM2", "COM3", "COM4", "COM5", "COM6", "COM7", "COM8", "COM9", "COM10",
                                       "COM11", "COM12", "COM13", "COM14", "COM15", "COM16", "COM17", "COM18", "COM19", "COM20"])
         self.com_port_combo.setFixedWidth(100)
+        # Play a binary log, session or raw dump through the same pipeline as a port
+        self.replay_button = QPushButton("Replay...")
+        self.replay_button.clicked.connect(self.choose_replay_file)
+        self.replay_speed_combo = QComboBox()
+        self.replay_speed_combo.addItems(["1x", "4x", "16x", "Max"])
         self.start_button = QPushButton("Start")
         self.start_button.clicked.connect(self.start_collection)
 
@@ -163,23 +327,59 @@ class MainWindow(QMainWindow):
         self.mode_button = QPushButton("Mode: RF")
         self.mode_button.clicked.connect(self.toggle_mode)
 
+        self.log_format = "text"
+        self.log_format_button = QPushButton("Log: Text")
+        self.log_format_button.clicked.connect(self.toggle_log_format)
+
+        # All log and image files are written from this thread, never the GUI thread
+        self.log_writer = LogWriter()
+        self.log_writer.start()
+        # Image chunks are reassembled in memory, each image is one atomic file write
+        self.image_assembler = ImageAssembler(self.log_writer.write_file)
+        self.image_log = None  # one JSON line per written image, opened with the first one
+        self.log_time = time.strftime("%H_%M_%S")
+        self.sync_log_checkbox = QCheckBox("Sync Log")
+        self.sync_log_checkbox.setToolTip("fsync every log write, slower but a crash only loses what is still queued, and the queue holds 10x more before dropping")
+        self.sync_log_checkbox.toggled.connect(self.set_log_durable)
+        self.capture_checkbox = QCheckBox("Capture Raw")
+        self.capture_checkbox.setToolTip("also record the raw port bytes to capture_HH_MM_SS_NNN.cap, for replay and resync debugging")
+        self.capture = None
+
         self.hex_text_edit = QTextEdit()
         self.hex_text_edit.setReadOnly(True)
 
-        self.command_text_edit = QTextEdit()
+        self.command_text_edit = QPlainTextEdit()
         self.command_text_edit.setReadOnly(True)
+        self.command_text_edit.setMaximumBlockCount(TERMINAL_MAX_LINES)
 
-        self.gps_text_edit = QTextEdit()
+        self.gps_text_edit = QPlainTextEdit()
         self.gps_text_edit.setReadOnly(True)
+        self.gps_text_edit.setMaximumBlockCount(GPS_MAX_LINES)
 
-        self.map_view = QWebEngineView()
+        # Text for the panes collected between render ticks, inserted in one go
+        self.terminal_pending = []
+        self.terminal_line_start = True
+        self.gps_pending = []
+
+        self.map_view = None  # created by ensure_map_view()
+        self.map_placeholder = QLabel("Waiting for GPS fix...")
+        self.map_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.map_data = None
-        self.marker_list = []
+        self.map_loaded = False
+        # Every fix at full resolution (bounded), and the decimated line drawn on the map
+        self.track_store = TrackStore()
+        self.track_display = TrackDecimator()
+        self.pending_points = []  # fixes not yet sent to the page
+        self.map_redraw = False  # the decimated line changed, resend all of it
+        self.export_map_button = QPushButton("Export Map")
+        self.export_map_button.clicked.connect(self.export_map)
 
         self.param_group_box = QGroupBox("Value Received")
         self.param_layout = QGridLayout()
         self.param_group_box.setLayout(self.param_layout)
         self.param_group_box.setFixedSize(800, 450)
+        self.param_value_labels = []
+        self.param_value_texts = []
 
         self.command_input = QLineEdit()
         self.send_button = QPushButton("Send")
@@ -189,7 +389,12 @@ class MainWindow(QMainWindow):
     #Create top layout
         top_layout = QHBoxLayout()
         top_layout.addWidget(self.com_port_combo)
+        top_layout.addWidget(self.replay_button)
+        top_layout.addWidget(self.replay_speed_combo)
         top_layout.addWidget(self.mode_button)
+        top_layout.addWidget(self.log_format_button)
+        top_layout.addWidget(self.sync_log_checkbox)
+        top_layout.addWidget(self.capture_checkbox)
         top_layout.addWidget(self.clock_label)
         top_layout.addStretch(1)
         top_layout.addWidget(self.start_button)
@@ -206,12 +411,21 @@ class MainWindow(QMainWindow):
         frame_ok_label = QLabel("Frame OK:")
         frame_error_label = QLabel("Length Wrong:")
         crc_fail_label = QLabel("CRC Fail:")
+        discarded_label = QLabel("Resync Skip:")
+        log_queue_label = QLabel("Log Queue:")
+        images_label = QLabel("Images:")
+        last_image_label = QLabel("Last Image:")
 
         self.total_frame_value = QLabel("0")
         self.total_img_value = QLabel("0")
         self.frame_ok_value = QLabel("0")
         self.frame_error_value = QLabel("0")
         self.crc_fail_value = QLabel("0")
+        self.discarded_value = QLabel("0")
+        self.log_queue_value = QLabel("0")
+        self.images_value = QLabel("0")
+        self.images_value.setToolTip("Complete / written images")
+        self.last_image_value = QLabel("-")
 
         info_layout.addWidget(total_frame_label, 0, 0)
         info_layout.addWidget(self.total_frame_value, 0, 1)
@@ -238,6 +452,14 @@ class MainWindow(QMainWindow):
         info_layout.addWidget(self.frame_error_value, 6, 1)
         info_layout.addWidget(crc_fail_label, 7, 0)
         info_layout.addWidget(self.crc_fail_value, 7, 1)
+        info_layout.addWidget(discarded_label, 8, 0)
+        info_layout.addWidget(self.discarded_value, 8, 1)
+        info_layout.addWidget(log_queue_label, 9, 0)
+        info_layout.addWidget(self.log_queue_value, 9, 1)
+        info_layout.addWidget(images_label, 10, 0)
+        info_layout.addWidget(self.images_value, 10, 1)
+        info_layout.addWidget(last_image_label, 11, 0)
+        info_layout.addWidget(self.last_image_value, 11, 1)
 
         info_group_box.setLayout(info_layout)
         info_group_box.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Expanding)
@@ -265,9 +487,10 @@ class MainWindow(QMainWindow):
         top_right_widget.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Expanding)
 
         map_group_box = QGroupBox("Map Tracking")
-        map_layout = QVBoxLayout()
-        map_layout.addWidget(self.map_view)
-        map_group_box.setLayout(map_layout)
+        self.map_layout = QVBoxLayout()
+        self.map_layout.addWidget(self.map_placeholder)
+        self.map_layout.addWidget(self.export_map_button, alignment=Qt.AlignmentFlag.AlignRight)
+        map_group_box.setLayout(self.map_layout)
         bottom_right_widget = QWidget()
         bottom_right_layout = QVBoxLayout()
         bottom_right_layout.addWidget(map_group_box) 
@@ -277,92 +500,6 @@ class MainWindow(QMainWindow):
         hex_group_box = QGroupBox("Command Guide")
         hex_layout = QVBoxLayout()
 
-        commands = [
-            ("---", "SIMPLE COMMAND"),
-            ("help", "Display list of simple help commands"),
-            ("help_all", "Display list of ALL!!! commands"),
-            ("help_cpoc", "Display list of CPOC commands"),
-            ("help_pmu", "Display list of PMU commands"),
-            ("help_pdu", "Display list of PDU commands"),
-            ("help_cam", "Display list of CAM commands"),
-            ("help_iou", "Display list of IOU commands"),
-            ("splash", "Splash screen again"),
-            ("---", "CPOC CMD"),
-            ("status_now", "Display <Date&Time>, <Temp> *C, <HardwareVer>, <FirmwareVer>, <Enable>, <Mode>"),
-            ("auto_report_ena", "Enable Mirror 282 byte to Text as Debug Port [ESC]"),
-            ("rs422_report_ena", "Report 282 byte packet to RS422, [ESC] to stop***"),
-            ("set_byte_rs422 <size>", "Set Size of packet RS422, Default 282 (150<x<1000)"),
-            ("set_baud_rs422 <baudrate>", "[9600|19200|38400|115200|230400|460800], Default 115200"),
-            ("set_fre_rs422 <packet>", "[0(0.5)|1|2|3|4|5|6|7|8|9|10|11|12], Packet per second"),
-            ("swap_byte_ena", "Enable swap byte RS422, 0x02->0xFE, 0x03->0xFD"),
-            ("swap_byte_dis", "Disable swap byte RS422"),
-            ("push_data <data> <position>", "Test push data to FRAM"),
-            ("pop_data <position>", "Test pop data from FRAM"),
-            ("recovery_setmode <0-off/1-on>", "PowerLost - Returns to previous state"),
-            ("send_frame_status", "Send Frame Status"),
-            ("send_frame_cam <packet_count>", "Send Frame CAM with packet_count [0-26]"),
-            ("memory_usage", "%RAM and %FLASH Used"),
-            ("time_get", "Get RTC Time"),
-            ("time_set <hh> <mm> <ss> <DD> <MM> <YY>", "Time Setting, Eg. 12:01 31/7/2024 -> 12 01 0 31 7 24"),
-            ("cpoc_reset", "Reset CPOC Board"),
-            ("board_alive", "Hello to specified board, check alive"),
-            ("mux_mode", "Set Mux UART Mode"),
-            ("rf_ena", "Enable RF Module"),
-            ("rf_dis", "Disable RF Module"),
-            ("gps_get", "Get GPS Data"),
-            ("gps_auto", "Continuously send  GPS Data to LORA"),
-            ("gps_format <1-On/0-Off>", "Format GPS Data"),
-            ("---", "PMU CMD"),
-            ("pmu_get_temp", "Response 4 NTC channel in Celsius "),
-            ("pmu_bat_vol", "Response 4 BAT channel in Voltage"),
-            ("pmu_parag_in", "Response V_in, I_in from 28V source"),
-            ("pmu_parag_out", "Response V_out, I_out from output 14.4V source"),
-            ("pmu_set_tpoint <low> <high>", "Set lowpoint < highpoint to control heater temp"),
-            ("pmu_set_output <0/1 EN/DIS>", "Enable/disable output 14.4v"),
-            ("pmu_set_pwm <Duty>", "Set PWM control in %(0-100) of 14.4v ->(0-100)"),
-            ("pmu_set_heater <channel> <state>", "Turn on/off the heater ->(0: OFF, 1: ON)"),
-            ("pmu_auto_heater <state>", "Turn on/off auto control heater ->(0: OFF, 1: ON)"),
-            ("pmu_get_all", "Response all Params in this board"),
-            ("---", "PDU CMD"),
-            ("pdu_set_channel <channel> <state>", "Turn on/off channel N ->(0: OFF, 1: ON)"),
-            ("pdu_set_buck <buck> <state>", "Turn on/off buck N ->(0: OFF, 1: ON)"),
-            ("pdu_set_all <state>", "Turn on/off buck + channel ->(0: OFF, 1: ON)"),
-            ("pdu_get_channel <channel>", "Get parameter of channel N"),
-            ("pdu_get_buck <buck>", "Get parameter of Buck N"),
-            ("pdu_get_all", "Get all parameters"),
-            ("---", "CAM CMD"),
-            ("cam_check_cam", "Check Camera connection"),
-            ("cam_check_spec", "Check Spectrometer connection"),
-            ("cam_set_cam_exp <time_ms>", "Set Camera exposure time, default 10"),
-            ("cam_get_cam_exp", "Get current Camera exposure time"),
-            ("cam_set_spec_exp <time_ms>", "Set Spectrometer exposure time, default 10"),
-            ("cam_get_spec_exp", "Get current Spectrometer exposure time"),
-            ("cam_set_routine <time_ms>", "Set routine interval time"),
-            ("cam_get_routine", "Get current routine interval, default 1000"),
-            ("cam_start_routine", "Start periodic routine"),
-            ("cam_stop_routine", "Stop periodic routine"),
-            ("cam_get_data", "Get CAM datapacket"),
-            ("cam_get_img", "Get CAM datapacket"),
-            ("---", "IOU CMD"),
-            ("iou_set_temp <channel> <temp>", "Set temperature of channel ->(250 mean 25.0Cel)"),
-            ("iou_get_temp <device> <channel>", "Response temperature of this channel ->(0: NTC, 1: 1Wire, 2: I2C-channel0)"),
-            ("iou_temp_setpoint <channel>", "Response temperature set point of this channel"),
-            ("iou_tec_ena <channel>", "Enable operation of this channel TEC"),
-            ("iou_tec_dis <channel>", "Disable operation of this channel TEC"),
-            ("iou_tec_ena_auto <channel>", "Enable auto control this channel TEC"),
-            ("iou_tec_dis_auto <channel>", "Disable auto control this channel TEC"),
-            ("iou_tec_set_output <channel> <mode> <vol>", "Set output TEC Voltage (Channel) (0: Cool, 1: Heat) (150 mean 1.50)"),
-            ("iou_tec_set_auto_vol <channel> <vol>", "Automatically control TEC Voltage"),
-            ("iou_tec_status", "Get TEC status data"),
-            ("iou_ringled_setrgbw <r> <g> <b> <w>", "Set display mode for RingLed (0-255)"),
-            ("iou_ringled_getrgbw", "Get display mode of RingLed"),
-            ("iou_get_accel", "Get Accelerometer-Gyroscope"),
-            ("iou_get_press", "Get Pressure Sensor Data"),
-            ("iou_irled_set_bri <percent>", "Set brightness (0-100%) of IR led"),
-            ("iou_irled_get_bri", "Get brightness (0-100%) of IR led"),
-            ("iou_get_all", "Show all status of device in IOU board"),
-            ("iou_auto_status", "Auto update status IOU")
-        ]
 
 
         scroll_widget = QWidget()
@@ -393,22 +530,22 @@ class MainWindow(QMainWindow):
             def leaveEvent(self, event):
                 unbold_label(self)
 
-        for command in commands:
-            if command[0] == "---":
-                separator = QFrame()
-                separator.setFrameShape(QFrame.Shape.HLine)
-                separator.setFrameShadow(QFrame.Shadow.Sunken)
-                scroll_layout.addWidget(separator)
-
-                title_label = QLabel(command[1])
-                title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                font = title_label.font()
-                font.setBold(True)
-                title_label.setFont(font)
-                scroll_layout.addWidget(title_label)
-            else:
-                label = ClickableLabel(command[0])
-                label.setToolTip(command[1])
+        for section, commands in CATALOG:
+            separator = QFrame()
+            separator.setFrameShape(QFrame.Shape.HLine)
+            separator.setFrameShadow(QFrame.Shadow.Sunken)
+            scroll_layout.addWidget(separator)
+
+            title_label = QLabel(section)
+            title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            font = title_label.font()
+            font.setBold(True)
+            title_label.setFont(font)
+            scroll_layout.addWidget(title_label)
+
+            for command in commands:
+                label = ClickableLabel(usage(command))
+                label.setToolTip("\n".join([command.description] + [f"<{arg.name}>: {arg_range(arg)}" for arg in command.args]))
                 scroll_layout.addWidget(label)
 
         scroll_area = QScrollArea()
@@ -416,6 +553,28 @@ class MainWindow(QMainWindow):
         scroll_area.setWidget(scroll_widget)
 
         hex_layout.addWidget(scroll_area)
+
+        # Macros run a command sequence through the serial thread's queue and
+        # write the responses to macro_<name>_<time>.json
+        self.macros = dict(MACROS)
+        self.macro_run = None
+        self.macro_combo = QComboBox()
+        self.macro_combo.addItems(list(self.macros))
+        self.macro_combo.setCurrentText("health_sweep")
+        self.macro_pace_combo = QComboBox()
+        self.macro_pace_combo.addItems(["0 ms", "100 ms", "250 ms", "500 ms", "1000 ms"])
+        self.macro_pace_combo.setCurrentText("100 ms")
+        self.macro_pace_combo.setToolTip("Pause between a response and the next command")
+        self.run_macro_button = QPushButton("Run Macro")
+        self.run_macro_button.clicked.connect(self.run_macro)
+        self.load_macro_button = QPushButton("Load...")
+        self.load_macro_button.clicked.connect(self.choose_macro_file)
+        macro_layout = QHBoxLayout()
+        macro_layout.addWidget(self.macro_combo)
+        macro_layout.addWidget(self.macro_pace_combo)
+        macro_layout.addWidget(self.run_macro_button)
+        macro_layout.addWidget(self.load_macro_button)
+        hex_layout.addLayout(macro_layout)
         hex_group_box.setLayout(hex_layout)
         
         bottom_left_widget = QWidget()
@@ -451,6 +610,9 @@ class MainWindow(QMainWindow):
         command_layout.addWidget(self.command_text_edit)
         command_layout.addLayout(command_input_layout)
         command_layout.addLayout(button_layout)
+        # Latency of the last answered command, or the one that timed out
+        self.command_status_label = QLabel("")
+        command_layout.addWidget(self.command_status_label)
 
         command_group_box.setLayout(command_layout)
         command_group_box.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Expanding)
@@ -488,37 +650,68 @@ class MainWindow(QMainWindow):
         self.total_imgs = 0
         self.frame_error_count = 0
         self.crc_fail_count = 0
+        self.discarded_bytes = 0
         self.frame_ok = 0
         self.log_file = None
+        self.error_file = None
+        self.binary_log = None
+        self.session = None
     def update_clock(self):
         current_time = datetime.now().strftime("%H:%M:%S")
         self.clock_label.setText(current_time)
+        if hasattr(self, "log_writer"):
+            stats = self.log_writer.stats()
+            self.log_queue_value.setText(f"{stats['queue_depth']} ({stats['mean_latency_ms']:.1f}/{stats['max_latency_ms']:.1f} ms, {stats['dropped_items']} dropped)")
 
     def start_collection(self):
         try:
             if self.serial_thread is None:
                 com_port = self.com_port_combo.currentText()
                 baud_rate = 115200
-                self.serial_thread = SerialThread(com_port, baud_rate)
+                current_time = time.strftime("%H_%M_%S")
+                if self.capture_checkbox.isChecked():
+                    self.capture = CaptureWriter(f"capture_{current_time}")
+                    self.capture.start()
+                self.serial_thread = SerialThread(com_port, baud_rate, rs422_frame_size=self.rs422_frame_size, batch_interval=self.batch_interval,
+                                                  replay_speed=self.replay_speed(), capture=self.capture)
+                self.serial_thread.set_mode(self.is_rf_mode)
                 self.serial_thread.data_received.connect(self.handle_data_received)
-                self.serial_thread.data_received_bypass.connect(self.handle_data_received)
+                self.serial_thread.frames_received.connect(self.handle_frames_received)
+                self.serial_thread.text_received.connect(self.handle_text_received)
+                self.serial_thread.command_completed.connect(self.handle_command_completed)
+                self.serial_thread.rs422_frame_size_changed.connect(self.handle_rs422_frame_size_changed)
                 self.serial_thread.error_occurred.connect(self.handle_error)
                 self.serial_thread.frame_error.connect(self.handle_frame_error)
                 self.serial_thread.crc_failed.connect(self.handle_crc_fail)
+                self.serial_thread.bytes_discarded.connect(self.handle_bytes_discarded)
+                self.serial_thread.finished.connect(self.handle_thread_finished)
                 self.serial_thread.start()
                 self.start_button.setText("Stop")
                 
 
-                current_time = time.strftime("%H_%M_%S")
-                log_filename = f"log_{current_time}.txt"
-                self.log_file = open(log_filename, "w")
-                error_filename = f"error_{current_time}.txt"
-                self.error_file = open(error_filename, "w")
+                if self.log_format == "text":
+                    log_filename = f"log_{current_time}.txt"
+                    self.log_file = self.log_writer.open(log_filename, "w")
+                    error_filename = f"error_{current_time}.txt"
+                    self.error_file = self.log_writer.open(error_filename, "w")
+                else:
+                    # One file for every frame, "python binlog.py" turns it back into text
+                    log_file = self.log_writer.open(f"log_{current_time}.bin", "wb")
+                    self.binary_log = BinaryLogWriter(compress=self.log_format == "binary_zlib", file=log_file)
+                # Indexed copy of every frame for random access, see session.py
+                self.session = SessionWriter(f"session_{current_time}", opener=self.log_writer.open)
+                self.log_time = current_time
             else:
                 self.serial_thread.stop()
                 self.serial_thread.wait()
                 self.serial_thread = None
                 self.start_button.setText("Start")
+                if self.macro_run is not None:
+                    self.finish_macro()  # report what was answered before the port closed
+                self.handle_image_reports(self.image_assembler.flush())
+                if self.image_log:
+                    self.image_log.close()
+                    self.image_log = None
                 
                 if self.log_file:
                     self.log_file.close()
@@ -526,388 +719,196 @@ class MainWindow(QMainWindow):
                 if self.error_file:
                     self.error_file.close()
                     self.error_file = None
+                if self.binary_log:
+                    self.binary_log.close()
+                    self.binary_log = None
+                if self.session:
+                    self.session.close()
+                    self.session = None
+                if self.capture:
+                    self.capture.close()
+                    self.capture = None
         except Exception as e:                
             print(f"Error in start: {str(e)}") 
 
+    def handle_frames_received(self, frames, counters):
+        self.frame_error_count += counters["length_fail"]
+        self.crc_fail_count += counters["crc_fail"]
+        self.discarded_bytes += counters["discarded_bytes"]
+        self.labels_dirty = True
+        for frame in frames:
+            self.handle_data_received(len(frame.data), frame.data, frame.status)
+
     def handle_data_received(self, frame_count, data, status):
         try:
             if self.auto_report_enabled:
-                timestamp = time.strftime("%H:%M:%S")
-                text = f"{timestamp}: Frame {frame_count}: "
-                text += ", ".join([f"0x{byte:02X}" for byte in data])
-                text += f"\nTotal bytes: {frame_count}\n"
        #         self.hex_text_edit.append(text)
                 self.total_frames += 1
-
-                if status == "ok":
-                    text += "Status: OK\n\n"
-                elif status == "crc_fail":
-                    text += "Status: CRC Failed\n\n"
-                elif status == "length_fail":
-                    text += "Status: Frame Length Failed\n\n"
                 
-                self.update_labels()
+                self.labels_dirty = True
+
+                if self.session:
+                    self.session.write_frame(data, status)
+                if self.binary_log:
+                    # Raw frame plus timestamp and status, no per-byte formatting
+                    self.binary_log.write_frame(data, status)
+                elif self.log_file or self.error_file:
+                    text = format_frame_text(data, status, time.strftime("%H:%M:%S"))
                     
-                if status == "ok" and self.log_file:
-                    self.log_file.write(text)
-                    self.log_file.flush()
-
-                if status != "ok" and self.error_file:
-                    self.error_file.write(text)
-                    self.error_file.flush()
-
-                if len(data) == 284 and data[2] != 0xFF:
-                    if not hasattr(self, 'image_file') or data[2] == 0x00:
-                        # Open a new file if no file is currently open or if byte[2] is 0x00
-                        timestamp = time.strftime("%H_%M_%S")
-                        self.image_file = open(f"{timestamp}_img.txt", "wb")
-                        self.image_frame_counter = 0
-
-                    # Write the image data (byte[3] to byte[280]) to the file
-                    self.image_file.write(bytes(data[3:281]))
-                    self.image_file.flush()
-                    self.image_frame_counter += 1
-                    self.total_imgs += 1
-                    if data[2] == 0x1A or self.image_frame_counter == 27:
-                        # Close the file if byte[2] is 0x1A or 27 frames have been written
-                        self.image_file.close()
-                        del self.image_file
-                        del self.image_frame_counter
+                    if status == "ok" and self.log_file:
+                        self.log_file.write(text)
 
-                    return
-                    
-                if len(data) == 284 and data[2] == 0xFF:
-                    for i in reversed(range(self.param_layout.count())):
-                        widget = self.param_layout.itemAt(i).widget()
-                        if widget is not None:
-                            widget.deleteLater()
-                    self.history_count = self.history_count + 1
-                    if self.history_count > 11:
-                        self.history_count = 0
-                        self.clear_text_edit()
-                    # Decode and display parameters
-                    row = 0
-                    col = 0
-                    def add_param(name, value="", unit=""):
-                        nonlocal row, col
-                        if name:
-                            self.param_layout.addWidget(QLabel(f"{name}:"), row, col)
-                        else:
-                            self.param_layout.addWidget(QLabel(""), row, col)
-                        self.param_layout.addWidget(QLabel(f"{value}{unit}"), row, col + 1)
-                        col += 2
-                        if col >= 8:
-                            col = 0
-                            row += 1
-                            
-
-
-                    def add_line():
-                        nonlocal row, col
-                        row += 1  
-                        line = QFrame()
-                        line.setFrameShape(QFrame.Shape.HLine)
-                        line.setFrameShadow(QFrame.Shadow.Sunken)
-                        self.param_layout.addWidget(line, row, 0, 1, 8)  # Span columns
-                        row += 1
-                        col = 0 
-
-                    def format_value_100(value):
-                        return "<b>{:.2f}</b>".format(value / 100)
-
-                    def format_value_10(value):
-                        return "<b>{:.2f}</b>".format(value / 10)
-
-                    def format_value_10_1_decimal(value):
-                        return "<b>{:.1f}</b>".format(value / 10)
-                    
-                    def format_value_bold(value):
-                        return "<b>{:.2f}</b>".format(value)
-
-                    def format_value_bold_ori(value):
-                        return "<b>{}</b>".format(value)
-
-                    def to_int16(value):
-                        if value >= 0x8000:
-                            value = value - 0x10000
-                        return value
-
-                    time_str = "<b>{:02d}:{:02d}:{:02d}</b>".format(data[5], data[4], data[3])
-                    date_str = "<b>{:02d}/{:02d}</b>".format(data[6], data[7])
-                    add_param("Time", time_str)
-                    add_param("Date", date_str)
-
-                    # Extract RGBW values
-                    neo_led_r = data[39]
-                    neo_led_g = data[40]
-                    neo_led_b = data[41]
-                    neo_led_w = data[42]
-                    rgbw_value = "<b>{}/{}/{}/{}</b>".format(neo_led_r, neo_led_g, neo_led_b, neo_led_w)
-                    add_param("RGBW", rgbw_value)
+                    if status != "ok" and self.error_file:
+                        self.error_file.write(text)
 
-                    add_line()
+                frame_length = self.frame_length()
+                if len(data) == frame_length and data[2] != 0xFF:
+                    # byte[2] is the chunk sequence number, byte[3] to byte[-4] the image data
+                    self.total_imgs += 1
+                    self.handle_image_reports(self.image_assembler.add(data, status))
+                    
+                elif len(data) == frame_length and data[2] == 0xFF:
+                    # Decoding for display waits for the next render tick, only the latest frame is shown
+                    self.pending_telemetry = data
+                    if status == "ok":
+                        self.record_gps_fix(data)
+
+                if not self.render_interval:
+                    self.render_tick()
+        except Exception as e:
+            print(f"Massive Error: {str(e)}") 
 
-                    # Skip byte 8 (0xFF)
-                    iou_data = data[9:39]
-                    param_names = [
-                        "t°NTC CH0", "t°NTC CH1", "t°NTC CH2", "t°NTC CH3",
-                        "t°1Wire CH0", "t°1Wire CH1", "t°Sensor", "",
-                        "SetPoint CH0", "SetPoint CH1", "SetPoint CH2", "SetPoint CH3",
-                        "Vol TEC0", "Vol TEC1", "Vol TEC2", "Vol TEC3",
-                    ]
-
-                    param_units = {
-                        "t°NTC CH0": "°C", "t°NTC CH1": "°C", "t°NTC CH2": "°C", "t°NTC CH3": "°C",
-                        "t°1Wire CH0": "°C", "t°1Wire CH1": "°C", "t°Sensor": "°C",
-                        "SetPoint CH0": "°C", "SetPoint CH1": "°C", "SetPoint CH2": "°C", "SetPoint CH3": "°C",
-                        "Vol TEC0": "V", "Vol TEC1": "V", "Vol TEC2": "V", "Vol TEC3": "V",
-                    }
-
-                    data_index = 0
-                    for name in param_names:
-                        if name:  # Not a blank field
-                            if 2 * data_index + 1 < len(iou_data):
-                                high_byte = iou_data[2 * data_index]
-                                low_byte = iou_data[2 * data_index + 1]
-                                value = to_int16((high_byte << 8) | low_byte)
-                                unit = param_units.get(name, "")  # Get the unit for the current parameter
-                                
-                                if name in ["t°NTC CH0", "t°NTC CH1", "t°NTC CH2", "t°NTC CH3", "t°1Wire CH0", "t°1Wire CH1", "t°Sensor"]:
-                                    if value in [-32768, 32767]:
-                                        add_param(name, "<b>FAIL</b>", "")
-                                    else:
-                                        add_param(name, format_value_10(value), unit)
-                                elif name in ["SetPoint CH0", "SetPoint CH1", "SetPoint CH2", "SetPoint CH3"]:
-                                    add_param(name, format_value_10(value), unit)
-                                elif name in ["Vol TEC0", "Vol TEC1", "Vol TEC2", "Vol TEC3"]:
-                                    add_param(name, format_value_100(value), unit)
-                                else:
-                                    add_param(name, format_value_bold(value), unit)
-                                    
-                                data_index += 1
-                        else:
-                            add_param(name)  # Add the blank field
-
-
-
-                    irled = data[43]
-                    irled_value = format_value_bold_ori(irled)
-                    add_param("irLED", irled_value, "%")
-
-                    aX = to_int16((data[44] << 8) | data[45])
-                    aY = to_int16((data[46] << 8) | data[47])
-                    aZ = to_int16((data[48] << 8) | data[49])
-                    Press = to_int16((data[56] << 8) | data[57])
-                    gX = to_int16((data[50] << 8) | data[51])
-                    gY = to_int16((data[52] << 8) | data[53])
-                    gZ = to_int16((data[54] << 8) | data[55])
-
-                    if aX >= 32767 or aY >= 32767 or aZ >= 32767 or gX >= 32767 or gY >= 32767 or gZ >= 32767:
-                        add_param("aX", format_value_bold_ori("FAIL"), "")
-                        add_param("aY", format_value_bold_ori("FAIL"), "")
-                        add_param("aZ", format_value_bold_ori("FAIL"), "")
-                        if Press >= 32767:
-                            add_param("Press", format_value_bold_ori("FAIL"), "")
-                        else:
-                            add_param("Press", format_value_10_1_decimal(Press), "hPa")
-                        add_param("gX", format_value_bold_ori("FAIL"), "")
-                        add_param("gY", format_value_bold_ori("FAIL"), "")
-                        add_param("gZ", format_value_bold_ori("FAIL"), "")
+    def handle_image_reports(self, reports):
+        for report in reports:
+            self.images_value.setText(f"{self.image_assembler.complete_images}/{self.image_assembler.images}")
+            self.last_image_value.setText(format_image_report(report))
+            if self.image_log is None:
+                self.image_log = self.log_writer.open(f"images_{self.log_time}.jsonl", "w")
+            self.image_log.write(json.dumps(report._asdict()) + "\n")
+
+    def handle_text_received(self, text):
+        # Command responses for the Terminal text box, already split at line ends
+        self.terminal_pending.append(text)
+        if not self.render_interval:
+            self.flush_text_panes()
+
+    def render_tick(self):
+        if self.labels_dirty:
+            self.labels_dirty = False
+            self.update_labels()
+        if self.pending_telemetry is not None:
+            data = self.pending_telemetry
+            self.pending_telemetry = None
+            self.display_telemetry(data)
+        self.flush_map_points()
+        self.flush_text_panes()
+        self.handle_image_reports(self.image_assembler.poll())
+
+    def append_terminal_line(self, text):
+        # A line of our own (sent commands, notes) between the device output
+        if self.terminal_pending:
+            at_line_start = self.terminal_pending[-1].endswith("\n")
+        else:
+            at_line_start = self.terminal_line_start
+        prefix = "" if at_line_start else "\n"
+        self.terminal_pending.append(f"{prefix}{text}\n")
+        if not self.render_interval:
+            self.flush_text_panes()
+
+    def flush_text_panes(self):
+        if self.terminal_pending:
+            text = "".join(self.terminal_pending)
+            self.terminal_pending = []
+            self.terminal_line_start = text.endswith("\n")
+            self.command_text_edit.moveCursor(QTextCursor.MoveOperation.End)
+            self.command_text_edit.insertPlainText(text)
+        if self.gps_pending:
+            text = "\n".join(self.gps_pending)
+            self.gps_pending = []
+            self.gps_text_edit.appendPlainText(text)
+
+    def display_telemetry(self, data):
+        try:
+            # Decode and display parameters, the grid is built on the first
+            # frame and later frames only update the value labels that changed
+            row = 0
+            col = 0
+            slot = 0
+            build_grid = not self.param_value_labels
+            def add_param(name, value="", unit=""):
+                nonlocal row, col, slot
+                text = f"{value}{unit}"
+                if build_grid:
+                    if name:
+                        self.param_layout.addWidget(QLabel(f"{name}:"), row, col)
                     else:
-                        add_param("aX", format_value_100(aX), "m/s²")
-                        add_param("aY", format_value_100(aY), "m/s²")
-                        add_param("aZ", format_value_100(aZ), "m/s²")
-                        if Press >= 32767:
-                            add_param("Press", format_value_bold_ori("FAIL"), "")
-                        else:
-                            add_param("Press", format_value_10_1_decimal(Press), "hPa")
-                        add_param("gX", format_value_bold_ori(gX), "°/s")
-                        add_param("gY", format_value_bold_ori(gY), "°/s")
-                        add_param("gZ", format_value_bold_ori(gZ), "°/s")
+                        self.param_layout.addWidget(QLabel(""), row, col)
+                    value_label = QLabel(text)
+                    self.param_layout.addWidget(value_label, row, col + 1)
+                    self.param_value_labels.append(value_label)
+                    self.param_value_texts.append(text)
+                elif self.param_value_texts[slot] != text:
+                    self.param_value_labels[slot].setText(text)
+                    self.param_value_texts[slot] = text
+                slot += 1
+                col += 2
+                if col >= 8:
+                    col = 0
+                    row += 1
+                    
 
 
+            def add_line():
+                nonlocal row, col
+                row += 1  
+                if build_grid:
+                    line = QFrame()
+                    line.setFrameShape(QFrame.Shape.HLine)
+                    line.setFrameShadow(QFrame.Shadow.Sunken)
+                    self.param_layout.addWidget(line, row, 0, 1, 8)  # Span columns
+                row += 1
+                col = 0 
+
+            values = decode_telemetry(data)
+            for name in PARAM_LAYOUT:
+                if name == "---":
                     add_line()
+                elif not name:
+                    add_param(name)  # Add the blank field
+                elif name == "Time":
+                    add_param(name, "<b>{:02d}:{:02d}:{:02d}</b>".format(values["Hour"], values["Minute"], values["Second"]))
+                elif name == "Date":
+                    add_param(name, "<b>{:02d}/{:02d}</b>".format(values["Day"], values["Month"]))
+                elif name == "RGBW":
+                    add_param(name, "<b>{}/{}/{}/{}</b>".format(values["LED R"], values["LED G"], values["LED B"], values["LED W"]))
+                elif values[name] is None:
+                    add_param(name, "<b>FAIL</b>", "")
+                else:
+                    add_param(name, f"<b>{format_value(name, values[name])}</b>", FIELDS_BY_NAME[name].unit)
 
-                    pdu_data = data[58:112]
-
-                    # Extract and display PDU parameters
-                    sBUCK_TEC1 = pdu_data[0]
-                    Vol_BUCK_TEC1 = (pdu_data[1] << 8) | pdu_data[2]
-                    sBUCK_TEC2 = pdu_data[3]
-                    Vol_BUCK_TEC2 = (pdu_data[4] << 8) | pdu_data[5]
-                    sBUCK_TEC3 = pdu_data[6]
-                    Vol_BUCK_TEC3 = (pdu_data[7] << 8) | pdu_data[8]
-                    sBUCK_TEC4 = pdu_data[9]
-                    Vol_BUCK_TEC4 = (pdu_data[10] << 8) | pdu_data[11]
-                    sBUCK_MCU = pdu_data[12]
-                    Vol_BUCK_MCU = (pdu_data[13] << 8) | pdu_data[14]
-                    sBUCK_LED = pdu_data[15]
-                    Vol_BUCK_LED = (pdu_data[16] << 8) | pdu_data[17]
-                    sBUCK_CM4 = pdu_data[18]
-                    Vol_BUCK_CM4 = (pdu_data[19] << 8) | pdu_data[20]
-                    sTEC1 = pdu_data[21]
-                    Amp_TEC1 = (pdu_data[22] << 8) | pdu_data[23]
-                    sTEC2 = pdu_data[24]
-                    Amp_TEC2 = (pdu_data[25] << 8) | pdu_data[26]
-                    sTEC3 = pdu_data[27]
-                    Amp_TEC3 = (pdu_data[28] << 8) | pdu_data[29]
-                    sTEC4 = pdu_data[30]
-                    Amp_TEC4 = (pdu_data[31] << 8) | pdu_data[32]
-                    sCOPC = pdu_data[33]
-                    Amp_COPC = (pdu_data[34] << 8) | pdu_data[35]
-                    sIOU = pdu_data[36]
-                    Amp_IOU = (pdu_data[37] << 8) | pdu_data[38]
-                    sRGB = pdu_data[39]
-                    Amp_RGB = (pdu_data[40] << 8) | pdu_data[41]
-                    sIR = pdu_data[42]
-                    Amp_IR = (pdu_data[43] << 8) | pdu_data[44]
-                    sCM4 = pdu_data[45]
-                    Amp_CM4 = (pdu_data[46] << 8) | pdu_data[47]
-                    sVIN = pdu_data[48]
-                    Vol_VIN = (pdu_data[49] << 8) | pdu_data[50]
-                    sVBUS = pdu_data[51]
-                    Vol_VBUS = (pdu_data[52] << 8) | pdu_data[53]
-
-                    # Add extracted PDU parameters
-                    def get_status_string(status):
-                        status_map = {
-                            0: "<b>OFF</b>",
-                            1: "<b>READY</b>",
-                            2: "<b>OverVOL!</b>",
-                            3: "<b>OverCUR!</b>",
-                            4: "<b>ON</b>"
-                        }
-                        return status_map.get(status, "Unknown")
-
-                    add_param("sBUCK TEC1", get_status_string(sBUCK_TEC1))
-                    add_param("Vol BUCK TEC1", format_value_100(Vol_BUCK_TEC1), "V")
-                    add_param("sBUCK TEC2", get_status_string(sBUCK_TEC2))
-                    add_param("Vol BUCK TEC2", format_value_100(Vol_BUCK_TEC2), "V")
-                    add_param("sBUCK TEC3", get_status_string(sBUCK_TEC3))
-                    add_param("Vol BUCK TEC3", format_value_100(Vol_BUCK_TEC3), "V")
-                    add_param("sBUCK TEC4", get_status_string(sBUCK_TEC4))
-                    add_param("Vol BUCK TEC4", format_value_100(Vol_BUCK_TEC4), "V")
-                    add_param("sBUCK MCU", get_status_string(sBUCK_MCU))
-                    add_param("Vol BUCK MCU", format_value_100(Vol_BUCK_MCU), "V")
-                    add_param("sBUCK LED", get_status_string(sBUCK_LED))
-                    add_param("Vol BUCK LED", format_value_100(Vol_BUCK_LED), "V")
-                    add_param("sBUCK CM4", get_status_string(sBUCK_CM4))
-                    add_param("Vol Buck CM4", format_value_100(Vol_BUCK_CM4), "V")
-                    add_param("sTEC1", get_status_string(sTEC1))
-                    add_param("Amp TEC1", format_value_100(Amp_TEC1), "A")
-                    add_param("sTEC2", get_status_string(sTEC2))
-                    add_param("Amp TEC2", format_value_100(Amp_TEC2), "A")
-                    add_param("sTEC3", get_status_string(sTEC3))
-                    add_param("Amp TEC3", format_value_100(Amp_TEC3), "A")
-                    add_param("sTEC4", get_status_string(sTEC4))
-                    add_param("Amp TEC4", format_value_100(Amp_TEC4), "A")
-                    add_param("sCOPC", get_status_string(sCOPC))
-                    add_param("Amp COPC", format_value_100(Amp_COPC), "A")
-                    add_param("sIOU", get_status_string(sIOU))
-                    add_param("Amp IOU", format_value_100(Amp_IOU), "A")
-                    add_param("sRGB", get_status_string(sRGB))
-                    add_param("Amp RGB", format_value_100(Amp_RGB), "A")
-                    add_param("sIR", get_status_string(sIR))
-                    add_param("Amp IR", format_value_100(Amp_IR), "A")
-                    add_param("sCM4", get_status_string(sCM4))
-                    add_param("Amp CM4", format_value_100(Amp_CM4), "A")
-                    add_param("sVIN", get_status_string(sVIN))
-                    add_param("Vol VIN", format_value_100(Vol_VIN), "V")
-                    add_param("sVBUS", get_status_string(sVBUS))
-                    add_param("Vol VBUS", format_value_100(Vol_VBUS), "V")
-
-                    add_line()
+            # Decode GPS
+            gps = decode_gps(data)
+            if gps is not None:
+                utc_time, latitude, longitude = gps
 
-                    pmu_data = data[112:136]
-                    pmu_param_names = [
-                        "NTC0", "NTC1", "NTC2", "NTC3",
-                        "BAT0", "BAT1", "BAT2", "BAT3",
-                        "VIN", "IIN", "VOUT", "IOUT"
-                    ]
-                    pmu_param_units = [
-                        "°C", "°C", "°C", "°C",
-                        "V", "V", "V", "V",
-                        "V", "A", "V", "A"
-                    ]
-
-                    def format_pmu_value(name, value):
-                        if name in ["NTC0", "NTC1", "NTC2", "NTC3"]:
-                            if value in [-32768, 32767]:
-                                return "<b>FAIL</b>", ""
-                            else:
-                                return format_value_100(value), "°C"
-                        elif name in ["BAT0", "BAT1", "BAT2", "BAT3", "VIN", "VOUT"]:
-                            return format_value_100(value), "V"
-                        elif name in ["IIN", "IOUT"]:
-                            return format_value_100(value), "A"
-                        else:
-                            return str(value), ""
-
-                    for i, name in enumerate(pmu_param_names):
-                        if 2 * i + 1 < len(pmu_data):
-                            high_byte = pmu_data[2 * i]
-                            low_byte = pmu_data[2 * i + 1]
-                            value = to_int16((high_byte << 8) | low_byte)
-                            formatted_value, unit = format_pmu_value(name, value)
-                            add_param(name, formatted_value, unit)
-
-
-                    # Decode GPS
-                    if len(data) >= 160:
-                        utc_time = f"{data[137]:02d}:{data[138]:02d}:{data[139]:02d}.{data[140]:02d}"
-                        
-                        lat_bytes = data[141:149]
-                        lat = struct.unpack('d', bytes(lat_bytes))[0]
-                        lat_dir = chr(data[149])
-
-                        lon_bytes = data[150:158]
-                        lon = struct.unpack('d', bytes(lon_bytes))[0]
-                        lon_dir = chr(data[158])
-
-                        lat_deg = int(lat / 100)
-                        lat_min = lat - (lat_deg * 100)
-
-                        lon_deg = int(lon / 100)
-                        lon_min = lon - (lon_deg * 100)
-                        
-                        latitude = lat_deg + (lat_min / 60)
-                        longitude = lon_deg + (lon_min / 60)
-
-                        if lat_dir == 'S':
-                            latitude = -latitude
-                        if lon_dir == 'W':
-                            longitude = -longitude
-
-                        gps_text = f"UTC Time: {utc_time}\n"
-                        gps_text += f"[Lat, Lon]: {latitude}, {longitude}\n"
-                        self.gps_text_edit.append(gps_text)
-
-                        try:
-                            if self.map_data is None:
-                                self.map_data = folium.Map(location=[latitude, longitude], zoom_start=17)
-                            
-                            marker = folium.Marker(location=[latitude, longitude])
-                            marker.add_to(self.map_data)
-                            self.marker_list.append(marker)
-                            
-                            map_html = self.map_data.get_root().render()
-                            self.map_view.setHtml(map_html)
-                            self.map_data.save("map.html")
-
-                        except Exception as e:
-                            print(f"Error creating or loading map: {str(e)}") 
-            else:
-                    # Display raw bytes in the Terminal text box
-                raw_data = ' '.join([f'{chr(byte)}' for byte in data])
-                self.command_text_edit.moveCursor(QTextCursor.MoveOperation.End)
-                self.command_text_edit.insertPlainText(raw_data)
+                gps_text = f"UTC Time: {utc_time}\n"
+                gps_text += f"[Lat, Lon]: {latitude}, {longitude}\n"
+                self.gps_pending.append(gps_text)
         except Exception as e:
             print(f"Massive Error: {str(e)}") 
 
+    def frame_length(self):
+        if self.is_rf_mode:
+            return FRAME_LENGTH
+        return self.rs422_frame_size + 2
+
     def update_labels(self):
         self.total_frame_value.setText(str(self.total_frames))
         self.total_img_value.setText(str(self.total_imgs))
         self.frame_ok_value.setText(str(self.total_frames - self.frame_error_count - self.crc_fail_count))
+        self.frame_error_value.setText(str(self.frame_error_count))
+        self.crc_fail_value.setText(str(self.crc_fail_count))
+        self.discarded_value.setText(f"{self.discarded_bytes} bytes")
 
 
     def handle_error(self, error_message):
@@ -922,9 +923,14 @@ class MainWindow(QMainWindow):
         self.crc_fail_count += 1
         self.crc_fail_value.setText(str(self.crc_fail_count))
 
+    def handle_bytes_discarded(self, count):
+        self.discarded_bytes += count
+        self.discarded_value.setText(f"{self.discarded_bytes} bytes")
+
     def clear_text_edit(self):
         #self.hex_text_edit.clear()
         self.gps_text_edit.clear()
+        self.gps_pending = []
         self.clear_map_markers()
 
     def reset_counters(self):
@@ -932,23 +938,17 @@ class MainWindow(QMainWindow):
         self.total_imgs = 0
         self.frame_error_count = 0
         self.crc_fail_count = 0
+        self.discarded_bytes = 0
+        self.image_assembler.images = 0
+        self.image_assembler.complete_images = 0
+        self.images_value.setText(str(0))
+        self.last_image_value.setText("-")
         self.total_frame_value.setText(str(0))
         self.total_img_value.setText(str(0))
         self.frame_error_value.setText(str(0))
         self.crc_fail_value.setText(str(0))
+        self.discarded_value.setText(str(0))
         self.frame_ok_value.setText(str(0))
-    def send_command(self):
-        command = self.command_input.text()
-        if self.serial_thread is not None and self.serial_thread.isRunning():
-            try:
-                self.serial_thread.serial_port.write(command.encode())
-                self.command_input.clear()
-                self.command_text_edit.append(f"Sent: {command}")  
-            except serial.SerialException as e:
-                QMessageBox.critical(self, "Error", f"Error sending command: {str(e)}")
-        else:
-            QMessageBox.warning(self, "Warning", "Serial port is not connected")
-            
     def toggle_theme(self):
         if self.theme_button.text() == "Dark Theme":
             self.apply_night_theme()
@@ -963,7 +963,7 @@ class MainWindow(QMainWindow):
                 background-color: #2b2b2b;
                 color: #ffffff;
             }
-            QTextEdit {
+            QTextEdit, QPlainTextEdit {
                 background-color: #1e1e1e;
                 color: #ffffff;
             }
@@ -993,44 +993,172 @@ class MainWindow(QMainWindow):
         self.command_input.clear()
         if command == "rs422_report_ena":
             self.auto_report_enabled = True
-            self.serial_thread.set_auto_report(True)
 
     def send_command(self):
+        # Written as typed, without a newline the console never prompts for it
         command = self.command_input.text()
-        self.send_serial_command(command)
+        self.send_serial_command(command, expect=None)
         self.command_input.clear()
 
     def send_auto_report_start(self):
         command = "rs422_report_ena\n"
-        self.send_serial_command(command)
+        self.send_serial_command(command, expect=None, urgent=True)
         self.auto_report_enabled = True
-        self.serial_thread.set_auto_report(True)
 
     def send_auto_report_stop(self):
         command = "\x1b"  # ESC
-        self.send_serial_command(command)
-        self.command_text_edit.append("Stop Auto Report")
+        # Ahead of any command still waiting for its response, the serial
+        # thread stops reading frames once the ESC is written
+        self.send_serial_command(command, expect=None, urgent=True)
+        self.append_terminal_line("Stop Auto Report")
         self.auto_report_enabled = False
-        self.serial_thread.set_auto_report(False)
 
-    def send_serial_command(self, command):
+    def send_serial_command(self, command, expect=True, urgent=False):
+        # Queued for the serial thread, which writes it and reports back through
+        # command_completed. Returns the command id, None when not sent.
         if self.serial_thread is not None and self.serial_thread.isRunning():
             try:
-                self.serial_thread.serial_port.write(command.encode())
-                self.command_text_edit.append(f"Sent: {command}")
-            except serial.SerialException as e:
-                QMessageBox.critical(self, "Error", f"Error sending command: {str(e)}")
+                check_command(command)
+            except ValueError as e:
+                self.append_terminal_line(f"Not sent: {command.strip()}: {str(e)}")
+                return None
+            command_id = self.serial_thread.submit_command(command, expect, urgent=urgent)
+            self.append_terminal_line(f"Sent: {command}")
+            return command_id
         else:
             QMessageBox.warning(self, "Warning", "Serial port is not connected")
 
+    def handle_rs422_frame_size_changed(self, frame_size):
+        self.rs422_frame_size = frame_size
+        self.append_terminal_line(f"RS422 frame size: {frame_size} bytes")
+
+    def handle_command_completed(self, result):
+        if self.macro_run is not None and self.macro_run.handle_result(result) and self.macro_run.done:
+            self.finish_macro()
+        command = result.command.strip() or repr(result.command)
+        latency = f"{result.latency * 1000:.0f} ms"
+        if result.status == "timeout":
+            self.append_terminal_line(f"Timeout: {command} ({latency} without a prompt)")
+        queued = self.serial_thread.commands.pending() if self.serial_thread is not None else 0
+        self.command_status_label.setText(f"Last command: {command} {result.status} {latency}, {queued} queued")
+
+    def run_macro(self):
+        if self.serial_thread is None or not self.serial_thread.isRunning():
+            QMessageBox.warning(self, "Warning", "Serial port is not connected")
+            return
+        if self.macro_run is not None:
+            QMessageBox.warning(self, "Warning", f"Macro {self.macro_run.name} is still running")
+            return
+        name = self.macro_combo.currentText()
+        pace = int(self.macro_pace_combo.currentText().split()[0]) / 1000
+        try:
+            self.macro_run = MacroRun(name, self.macros[name], pace)
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"Error in macro {name}: {str(e)}")
+            return
+        self.macro_run.start(self.serial_thread.submit_command)
+        self.append_terminal_line(f"Macro {name}: {len(self.macro_run.steps)} commands queued")
+
+    def finish_macro(self):
+        self.append_terminal_line(self.macro_run.summary())
+        path = f"macro_{self.macro_run.name}_{time.strftime('%H_%M_%S')}.json"
+        report = json.dumps(self.macro_run.report(), indent=2, ensure_ascii=False)
+        self.log_writer.write_file(path, report.encode("utf-8"))
+        self.append_terminal_line(f"Report: {path}")
+        self.macro_run = None
+
+    def choose_macro_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Load macro", "", "Macros (*.txt *.macro);;All files (*)")
+        if path:
+            name = os.path.splitext(os.path.basename(path))[0]
+            try:
+                self.macros[name] = load_macro(path)
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"Error loading macro: {str(e)}")
+                return
+            if self.macro_combo.findText(name) < 0:
+                self.macro_combo.addItem(name)
+            self.macro_combo.setCurrentText(name)
+
+    def ensure_map_view(self):
+        # Starting the web engine spawns Chromium, so wait until there is something to show
+        if self.map_view is None:
+            from PyQt6.QtWebEngineWidgets import QWebEngineView
+            self.map_view = QWebEngineView()
+            self.map_view.loadFinished.connect(self.handle_map_loaded)
+            self.map_layout.replaceWidget(self.map_placeholder, self.map_view)
+            self.map_placeholder.deleteLater()
+
+    def record_gps_fix(self, data):
+        # Every telemetry frame feeds the track, not only the ones that get displayed
+        gps = decode_gps(data)
+        if gps is None:
+            return
+        utc_time, latitude, longitude = gps
+        try:
+            self.add_map_point(latitude, longitude)
+        except Exception as e:
+            print(f"Error creating or loading map: {str(e)}")
+
+    def add_map_point(self, latitude, longitude):
+        self.track_store.append(time.time(), latitude, longitude)
+        if self.track_display.add(latitude, longitude):
+            self.map_redraw = True
+            self.pending_points = []
+        else:
+            self.pending_points.append((latitude, longitude))
+        if self.map_data is None:
+            # The page is rendered once, centred on the first fix
+            import folium
+            self.ensure_map_view()
+            self.map_data = folium.Map(location=[latitude, longitude], zoom_start=17)
+            self.map_loaded = False
+            self.map_view.setHtml(self.map_data.get_root().render())
+
+    def handle_map_loaded(self, ok):
+        if ok and self.map_data is not None:
+            self.map_view.page().runJavaScript(TRACK_SCRIPT.replace("MAP", self.map_data.get_name()))
+            self.map_loaded = True
+            self.map_redraw = True
+            self.flush_map_points()
+
+    def flush_map_points(self):
+        # Called every render tick, points arriving before the page has loaded wait here
+        if not self.map_loaded:
+            return
+        if self.map_redraw:
+            self.map_view.page().runJavaScript(f"setTrack({json.dumps(self.track_display.points())});")
+            self.map_redraw = False
+            self.pending_points = []
+        elif self.pending_points:
+            self.map_view.page().runJavaScript(f"addTrackPoints({json.dumps(self.pending_points)});")
+            self.pending_points = []
+
     def clear_map_markers(self):
-        if self.map_data is not None:
-            center = self.map_data.location
-            self.marker_list.clear()
-            self.map_data = folium.Map(location=center, zoom_start=17)
-            map_html = self.map_data.get_root().render()
-            self.map_view.setHtml(map_html)
-            self.map_data.save("map.html")
+        self.track_store.clear()
+        self.track_display.clear()
+        self.pending_points = []
+        self.map_redraw = False
+        if self.map_loaded:
+            self.map_view.page().runJavaScript("clearTrack();")
+
+    def export_map(self):
+        # Standalone folium page with every stored fix, not the decimated line
+        points = self.track_store.points()
+        if not points:
+            QMessageBox.information(self, "Export Map", "No GPS fix to export yet")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Map", "map.html", "HTML (*.html)")
+        if not path:
+            return
+        try:
+            import folium
+            map_data = folium.Map(location=list(points[0]), zoom_start=17)
+            folium.PolyLine(points, color="red", weight=3).add_to(map_data)
+            folium.Marker(location=list(points[-1])).add_to(map_data)
+            map_data.save(path)
+        except Exception as e:
+            print(f"Error exporting map: {str(e)}")
 
     def toggle_mode(self):
         self.is_rf_mode = not self.is_rf_mode
@@ -1040,6 +1168,38 @@ class MainWindow(QMainWindow):
             self.serial_thread.set_mode(self.is_rf_mode)
             self.serial_thread.clear_buffer()
 
+    def set_log_durable(self, durable):
+        self.log_writer.durable = durable
+
+    def closeEvent(self, event):
+        if self.capture:
+            self.capture.close()
+        self.handle_image_reports(self.image_assembler.flush())
+        self.log_writer.stop()
+        super().closeEvent(event)
+
+    def toggle_log_format(self):
+        # Text -> Binary -> Binary (zlib), takes effect on the next Start
+        formats = ["text", "binary", "binary_zlib"]
+        names = {"text": "Text", "binary": "Binary", "binary_zlib": "Binary (zlib)"}
+        self.log_format = formats[(formats.index(self.log_format) + 1) % len(formats)]
+        self.log_format_button.setText(f"Log: {names[self.log_format]}")
+
+    def choose_replay_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Replay recording", "", "Recordings (*.bin *.frames *.idx *.raw *.cap);;All files (*)")
+        if path:
+            self.com_port_combo.addItem(REPLAY_PREFIX + path)
+            self.com_port_combo.setCurrentIndex(self.com_port_combo.count() - 1)
+
+    def replay_speed(self):
+        speed = self.replay_speed_combo.currentText()
+        return 0 if speed == "Max" else float(speed.rstrip("x"))
+
+    def handle_thread_finished(self):
+        # A replay reached its end, stop like the Stop button so the logs get closed
+        if self.serial_thread is not None and self.sender() is self.serial_thread:
+            self.start_collection()
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
 
@@ -1055,7 +1215,7 @@ if __name__ == "__main__":
             background-color: #2b2b2b;
             color: #ffffff;
         }
-        QTextEdit {
+        QTextEdit, QPlainTextEdit {
             background-color: #1e1e1e;
             color: #ffffff;
         }
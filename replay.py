@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from bisect import bisect_right
+
+import serial
+
+from binlog import MAGIC, read_binary_log
+from capture import MAGIC as CAPTURE_MAGIC, read_capture
+from frame_parser import stuff_frame
+from session import FRAMES_SUFFIX, INDEX_SUFFIX, Session
+
+# Port names starting with this are played back from a file instead of opened
+REPLAY_PREFIX = "replay://"
+
+
+def is_replay_url(port_name):
+    return port_name.startswith(REPLAY_PREFIX)
+
+def frame_to_wire(data, is_rf_mode):
+    # Bytes the frame arrived as: stuffed between 0xCA/0xEF for RF, bare for RS422
+    if is_rf_mode:
+        return stuff_frame(data)
+    return bytes(data[1:-1])
+
+def load_recording(path, is_rf_mode=True, baud_rate=115200):
+    # Returns [(seconds from start, bytes)] for a binary log, a session, a raw capture or a raw byte dump
+    if path.endswith(FRAMES_SUFFIX) or path.endswith(INDEX_SUFFIX):
+        base_path = os.path.splitext(path)[0]
+        with Session(base_path) as session:
+            entries = [session.entry(i) for i in range(len(session))]
+            chunks = [(entry.timestamp, frame_to_wire(session.frames[entry.offset:entry.offset + entry.length], is_rf_mode))
+                      for entry in entries]
+    else:
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+        if magic == CAPTURE_MAGIC:
+            # Exactly the chunks the port returned, independent of the RF/RS422 mode
+            chunks = [(record.timestamp, record.data) for record in read_capture(path)]
+        elif magic == MAGIC:
+            chunks = [(record.timestamp, frame_to_wire(record.data, is_rf_mode)) for record in read_binary_log(path)]
+        else:
+            # No timestamps, pace it at the line rate (10 bits per byte) in 10 ms slices
+            with open(path, "rb") as f:
+                data = f.read()
+            size = max(1, baud_rate // 1000)
+            chunks = [(offset * 10 / baud_rate, data[offset:offset + size]) for offset in range(0, len(data), size)]
+    if chunks:
+        start = chunks[0][0]
+        chunks = [(timestamp - start, data) for timestamp, data in chunks]
+    return chunks
+
+
+class ReplayPort:
+    # Stands in for serial.Serial in SerialThread. Bytes become readable at their
+    # recorded time divided by speed, speed 0 hands out everything immediately.
+    def __init__(self, chunks, speed=1.0, timeout=1):
+        self.data = b''.join(data for timestamp, data in chunks)
+        self.times = [timestamp for timestamp, data in chunks]
+        self.ends = []
+        end = 0
+        for timestamp, data in chunks:
+            end += len(data)
+            self.ends.append(end)
+        self.speed = speed
+        self.timeout = timeout
+        self.position = 0
+        self.start_time = None
+        self.is_open = True
+        self.closed = threading.Event()
+
+    @classmethod
+    def from_url(cls, port_name, is_rf_mode=True, baud_rate=115200, speed=1.0, timeout=1):
+        path = port_name[len(REPLAY_PREFIX):]
+        try:
+            chunks = load_recording(path, is_rf_mode, baud_rate)
+        except (OSError, ValueError) as e:
+            raise serial.SerialException(f"could not replay {path}: {e}")
+        return cls(chunks, speed, timeout)
+
+    @property
+    def exhausted(self):
+        return self.position >= len(self.data)
+
+    @property
+    def in_waiting(self):
+        return self.due_end() - self.position
+
+    def elapsed(self):
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+        return (time.monotonic() - self.start_time) * self.speed
+
+    def due_end(self):
+        if not self.speed:
+            return len(self.data)
+        due = bisect_right(self.times, self.elapsed())
+        return self.ends[due - 1] if due else 0
+
+    def read(self, size=1):
+        deadline = time.monotonic() + (self.timeout if self.timeout is not None else float("inf"))
+        while self.is_open and not self.exhausted and self.in_waiting <= 0:
+            next_chunk = bisect_right(self.ends, self.position)
+            wait = (self.times[next_chunk] - self.elapsed()) / self.speed
+            wait = min(wait, deadline - time.monotonic())
+            if wait <= 0 and time.monotonic() >= deadline:
+                return b''
+            self.closed.wait(max(wait, 0))
+        if not self.is_open:
+            return b''
+        size = min(size, self.in_waiting)
+        data = self.data[self.position:self.position + size]
+        self.position += size
+        return data
+
+    def write(self, data):
+        # Commands sent during a replay go nowhere
+        return len(data)
+
+    def close(self):
+        self.is_open = False
+        self.closed.set()
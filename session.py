@@ -0,0 +1,173 @@
+import argparse
+import mmap
+import struct
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from binlog import STATUS_CODES, STATUS_NAMES
+
+# A session is two files next to the logs: <base>.frames holds the raw
+# destuffed frames back to back, <base>.idx one fixed-size record per frame
+# (offset into .frames, wall clock receive time, status, frame type, length).
+FRAMES_SUFFIX = ".frames"
+INDEX_SUFFIX = ".idx"
+INDEX_STRUCT = struct.Struct("<QdBBH")
+
+TELEMETRY_TYPE = 0xFF  # data[2] of a telemetry frame, image frames carry their sequence number
+NO_TYPE = 0xFE  # frame too short to have a type byte
+
+IndexEntry = namedtuple("IndexEntry", ["offset", "timestamp", "status", "frame_type", "length"])
+
+
+class SessionWriter:
+    # opener(path, mode) returns a binary file, e.g. LogWriter.open so writes stay off the GUI thread
+    def __init__(self, base_path, opener=open):
+        self.frames_file = opener(base_path + FRAMES_SUFFIX, "wb")
+        self.index_file = opener(base_path + INDEX_SUFFIX, "wb")
+        self.offset = 0
+
+    def write_frame(self, data, status, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        data = bytes(data)
+        frame_type = data[2] if len(data) > 2 else NO_TYPE
+        # A LogWriter file returns False for a write dropped by a full queue. The
+        # offset only moves for bytes that made it into .frames, a dropped index
+        # record just leaves that frame unindexed.
+        if not self.frames_file.write(data):
+            return
+        self.index_file.write(INDEX_STRUCT.pack(self.offset, timestamp, STATUS_CODES[status], frame_type, len(data)))
+        self.offset += len(data)
+
+    def close(self):
+        self.frames_file.close()
+        self.index_file.close()
+
+
+def map_file(path):
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            return None, memoryview(b'')
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped, memoryview(mapped)
+
+
+class Session:
+    # Read-only random access to a recorded session. frame() returns memoryview
+    # slices of the mapped file, release them before close().
+    def __init__(self, base_path):
+        self.frames_map, self.frames = map_file(base_path + FRAMES_SUFFIX)
+        self.index_map, self.index = map_file(base_path + INDEX_SUFFIX)
+        # Ignore a partly written tail left behind by a crash
+        count = len(self.index) // INDEX_STRUCT.size
+        while count:
+            offset, timestamp, status, frame_type, length = self.raw_entry(count - 1)
+            if offset + length <= len(self.frames):
+                break
+            count -= 1
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.frames.release()
+        self.index.release()
+        for mapped in (self.frames_map, self.index_map):
+            if mapped is not None:
+                mapped.close()
+
+    def raw_entry(self, i):
+        return INDEX_STRUCT.unpack_from(self.index, i * INDEX_STRUCT.size)
+
+    def entry(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        offset, timestamp, status, frame_type, length = self.raw_entry(i)
+        return IndexEntry(offset, timestamp, STATUS_NAMES[status], frame_type, length)
+
+    def frame(self, i):
+        entry = self.entry(i)
+        return self.frames[entry.offset:entry.offset + entry.length]
+
+    def timestamp(self, i):
+        return self.raw_entry(i)[1]
+
+    def index_at(self, when):
+        # First frame received at or after when (epoch seconds or "HH:MM:SS" on the session's first day)
+        when = self.resolve_time(when)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamp(middle) < when:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def between(self, start, end):
+        # (index, memoryview) for every frame received in [start, end)
+        end = self.resolve_time(end)
+        for i in range(self.index_at(start), self.count):
+            if self.timestamp(i) >= end:
+                break
+            yield i, self.frame(i)
+
+    def find(self, status=None, frame_type=None):
+        # Indices of the frames matching a status name and/or a frame type byte
+        status_code = STATUS_CODES[status] if status is not None else None
+        entries = INDEX_STRUCT.iter_unpack(self.index[:self.count * INDEX_STRUCT.size])
+        matches = []
+        for i, (offset, timestamp, code, kind, length) in enumerate(entries):
+            if status_code is not None and code != status_code:
+                continue
+            if frame_type is not None and kind != frame_type:
+                continue
+            matches.append(i)
+        return matches
+
+    def resolve_time(self, when):
+        if not isinstance(when, str):
+            return when
+        if not self.count:
+            return 0.0
+        day = datetime.fromtimestamp(self.timestamp(0))
+        clock = datetime.strptime(when, "%H:%M:%S")
+        return day.replace(hour=clock.hour, minute=clock.minute, second=clock.second, microsecond=0).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up frames in a recorded session")
+    parser.add_argument("base_path", help="session path without the .frames/.idx suffix")
+    parser.add_argument("--at", help="start at the first frame received at HH:MM:SS")
+    parser.add_argument("--status", choices=sorted(STATUS_CODES), help="only frames with this status")
+    parser.add_argument("--telemetry", action="store_true", help="only telemetry frames")
+    parser.add_argument("--images", action="store_true", help="only image frames")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with Session(args.base_path) as session:
+        frame_type = TELEMETRY_TYPE if args.telemetry else None
+        indices = session.find(status=args.status, frame_type=frame_type)
+        if args.images:
+            indices = [i for i in indices if session.entry(i).frame_type not in (TELEMETRY_TYPE, NO_TYPE)]
+        if args.at:
+            first = session.index_at(args.at)
+            indices = [i for i in indices if i >= first]
+        print(f"{len(session)} frames, {len(indices)} matching")
+        for i in indices[:args.limit]:
+            entry = session.entry(i)
+            received = datetime.fromtimestamp(entry.timestamp).strftime("%H:%M:%S.%f")[:-3]
+            print(f"{i:>8} {received} {entry.status:>11} type 0x{entry.frame_type:02X} {entry.length} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import math
+import struct
+from collections import namedtuple
+
+# One entry per field of the 284 byte telemetry frame (data[2] == 0xFF).
+# offset indexes the destuffed frame including the leading 0xCA, type is a
+# struct code, the raw value is divided by scale (left as int when scale is 1),
+# values in fail are decoded as None and fmt is a format string or a dict
+# naming each raw value.
+Field = namedtuple("Field", ["name", "offset", "type", "scale", "unit", "fail", "fmt"])
+
+TEMP_FAIL = (-32768, 32767)
+SENSOR_FAIL = (32767,)
+
+PDU_STATUS = {
+    0: "OFF",
+    1: "READY",
+    2: "OverVOL!",
+    3: "OverCUR!",
+    4: "ON",
+}
+
+TELEMETRY_FIELDS = [
+    Field("Second", 3, "B", 1, "", (), "{:02d}"),
+    Field("Minute", 4, "B", 1, "", (), "{:02d}"),
+    Field("Hour", 5, "B", 1, "", (), "{:02d}"),
+    Field("Day", 6, "B", 1, "", (), "{:02d}"),
+    Field("Month", 7, "B", 1, "", (), "{:02d}"),
+    # IOU
+    Field("t°NTC CH0", 9, "h", 10, "°C", TEMP_FAIL, "{:.2f}"),
+    Field("t°NTC CH1", 11, "h", 10, "°C", TEMP_FAIL, "{:.2f}"),
+    Field("t°NTC CH2", 13, "h", 10, "°C", TEMP_FAIL, "{:.2f}"),
+    Field("t°NTC CH3", 15, "h", 10, "°C", TEMP_FAIL, "{:.2f}"),
+    Field("t°1Wire CH0", 17, "h", 10, "°C", TEMP_FAIL, "{:.2f}"),
+    Field("t°1Wire CH1", 19, "h", 10, "°C", TEMP_FAIL, "{:.2f}"),
+    Field("t°Sensor", 21, "h", 10, "°C", TEMP_FAIL, "{:.2f}"),
+    Field("SetPoint CH0", 23, "h", 10, "°C", (), "{:.2f}"),
+    Field("SetPoint CH1", 25, "h", 10, "°C", (), "{:.2f}"),
+    Field("SetPoint CH2", 27, "h", 10, "°C", (), "{:.2f}"),
+    Field("SetPoint CH3", 29, "h", 10, "°C", (), "{:.2f}"),
+    Field("Vol TEC0", 31, "h", 100, "V", (), "{:.2f}"),
+    Field("Vol TEC1", 33, "h", 100, "V", (), "{:.2f}"),
+    Field("Vol TEC2", 35, "h", 100, "V", (), "{:.2f}"),
+    Field("Vol TEC3", 37, "h", 100, "V", (), "{:.2f}"),
+    Field("LED R", 39, "B", 1, "", (), "{}"),
+    Field("LED G", 40, "B", 1, "", (), "{}"),
+    Field("LED B", 41, "B", 1, "", (), "{}"),
+    Field("LED W", 42, "B", 1, "", (), "{}"),
+    Field("irLED", 43, "B", 1, "%", (), "{}"),
+    Field("aX", 44, "h", 100, "m/s²", SENSOR_FAIL, "{:.2f}"),
+    Field("aY", 46, "h", 100, "m/s²", SENSOR_FAIL, "{:.2f}"),
+    Field("aZ", 48, "h", 100, "m/s²", SENSOR_FAIL, "{:.2f}"),
+    Field("gX", 50, "h", 1, "°/s", SENSOR_FAIL, "{}"),
+    Field("gY", 52, "h", 1, "°/s", SENSOR_FAIL, "{}"),
+    Field("gZ", 54, "h", 1, "°/s", SENSOR_FAIL, "{}"),
+    Field("Press", 56, "h", 10, "hPa", SENSOR_FAIL, "{:.1f}"),
+]
+
+# PDU: 18 channels of (status byte, unsigned 16 bit value) from byte 58
+PDU_CHANNELS = [
+    ("sBUCK TEC1", "Vol BUCK TEC1", "V"),
+    ("sBUCK TEC2", "Vol BUCK TEC2", "V"),
+    ("sBUCK TEC3", "Vol BUCK TEC3", "V"),
+    ("sBUCK TEC4", "Vol BUCK TEC4", "V"),
+    ("sBUCK MCU", "Vol BUCK MCU", "V"),
+    ("sBUCK LED", "Vol BUCK LED", "V"),
+    ("sBUCK CM4", "Vol Buck CM4", "V"),
+    ("sTEC1", "Amp TEC1", "A"),
+    ("sTEC2", "Amp TEC2", "A"),
+    ("sTEC3", "Amp TEC3", "A"),
+    ("sTEC4", "Amp TEC4", "A"),
+    ("sCOPC", "Amp COPC", "A"),
+    ("sIOU", "Amp IOU", "A"),
+    ("sRGB", "Amp RGB", "A"),
+    ("sIR", "Amp IR", "A"),
+    ("sCM4", "Amp CM4", "A"),
+    ("sVIN", "Vol VIN", "V"),
+    ("sVBUS", "Vol VBUS", "V"),
+]
+for index, (status_name, value_name, unit) in enumerate(PDU_CHANNELS):
+    TELEMETRY_FIELDS.append(Field(status_name, 58 + 3 * index, "B", 1, "", (), PDU_STATUS))
+    TELEMETRY_FIELDS.append(Field(value_name, 59 + 3 * index, "H", 100, unit, (), "{:.2f}"))
+
+# PMU: 12 signed 16 bit values from byte 112
+PMU_CHANNELS = [
+    ("NTC0", "°C"), ("NTC1", "°C"), ("NTC2", "°C"), ("NTC3", "°C"),
+    ("BAT0", "V"), ("BAT1", "V"), ("BAT2", "V"), ("BAT3", "V"),
+    ("VIN", "V"), ("IIN", "A"), ("VOUT", "V"), ("IOUT", "A"),
+]
+for index, (name, unit) in enumerate(PMU_CHANNELS):
+    fail = TEMP_FAIL if unit == "°C" else ()
+    TELEMETRY_FIELDS.append(Field(name, 112 + 2 * index, "h", 100, unit, fail, "{:.2f}"))
+
+# If any member of a group hits its fail sentinel the whole group is FAIL
+FAIL_GROUPS = [
+    ("aX", "aY", "aZ", "gX", "gY", "gZ"),
+]
+
+# GPS block, the coordinates are little-endian NMEA ddmm.mmmm doubles
+GPS_FIELDS = [
+    Field("UTC Hour", 137, "B", 1, "", (), "{:02d}"),
+    Field("UTC Minute", 138, "B", 1, "", (), "{:02d}"),
+    Field("UTC Second", 139, "B", 1, "", (), "{:02d}"),
+    Field("UTC Centisecond", 140, "B", 1, "", (), "{:02d}"),
+    Field("Lat", 141, "d", 1, "", (), "{}"),
+    Field("Lat Dir", 149, "c", 1, "", (), "{}"),
+    Field("Lon", 150, "d", 1, "", (), "{}"),
+    Field("Lon Dir", 158, "c", 1, "", (), "{}"),
+]
+GPS_MIN_LENGTH = 160
+
+
+def compile_layout(fields, byte_order):
+    # Packs the fields into one struct format, gaps between them become pad bytes
+    fields = sorted(fields, key=lambda field: field.offset)
+    fmt = byte_order
+    position = fields[0].offset
+    for field in fields:
+        if field.offset < position:
+            raise ValueError(f"field {field.name} overlaps the previous field")
+        fmt += "x" * (field.offset - position) + field.type
+        position = field.offset + struct.calcsize(byte_order + field.type)
+    return struct.Struct(fmt), fields
+
+TELEMETRY_STRUCT, TELEMETRY_LAYOUT = compile_layout(TELEMETRY_FIELDS, ">")
+TELEMETRY_OFFSET = TELEMETRY_LAYOUT[0].offset
+GPS_STRUCT, GPS_LAYOUT = compile_layout(GPS_FIELDS, "<")
+GPS_OFFSET = GPS_LAYOUT[0].offset
+
+FIELDS_BY_NAME = {field.name: field for field in TELEMETRY_FIELDS + GPS_FIELDS}
+
+
+def scale_value(field, raw):
+    if raw in field.fail:
+        return None
+    if field.scale != 1:
+        return raw / field.scale
+    return raw
+
+def decode_telemetry(data):
+    values = {}
+    for field, raw in zip(TELEMETRY_LAYOUT, TELEMETRY_STRUCT.unpack_from(data, TELEMETRY_OFFSET)):
+        values[field.name] = scale_value(field, raw)
+    for group in FAIL_GROUPS:
+        if any(values[name] is None for name in group):
+            for name in group:
+                values[name] = None
+    return values
+
+def decode_gps(data):
+    # Returns (utc_time, latitude, longitude) in decimal degrees, None for short
+    # frames and when there is no fix (NaN/inf fill in the coordinates)
+    if len(data) < GPS_MIN_LENGTH:
+        return None
+    values = dict(zip((field.name for field in GPS_LAYOUT), GPS_STRUCT.unpack_from(data, GPS_OFFSET)))
+    utc_time = "{:02d}:{:02d}:{:02d}.{:02d}".format(
+        values["UTC Hour"], values["UTC Minute"], values["UTC Second"], values["UTC Centisecond"])
+    latitude = nmea_to_degrees(values["Lat"])
+    longitude = nmea_to_degrees(values["Lon"])
+    if latitude is None or longitude is None:
+        return None
+    if values["Lat Dir"] == b'S':
+        latitude = -latitude
+    if values["Lon Dir"] == b'W':
+        longitude = -longitude
+    return utc_time, latitude, longitude
+
+def nmea_to_degrees(value):
+    # ddmm.mmmm to decimal degrees, None for a value that isn't a number
+    if not math.isfinite(value):
+        return None
+    degrees = int(value / 100)
+    return degrees + (value - degrees * 100) / 60
+
+def format_value(name, value):
+    # Plain text for one decoded value, "FAIL" for a fail sentinel
+    if value is None:
+        return "FAIL"
+    fmt = FIELDS_BY_NAME[name].fmt
+    if isinstance(fmt, dict):
+        return fmt.get(value, "Unknown")
+    return fmt.format(value)
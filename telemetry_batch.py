@@ -0,0 +1,76 @@
+import numpy as np
+
+from frame_parser import FRAME_LENGTH
+from telemetry import FAIL_GROUPS, GPS_FIELDS, GPS_MIN_LENGTH, TELEMETRY_FIELDS
+
+# Struct codes of the frame layout mapped to NumPy types with the byte order
+# used on the wire, TELEMETRY_FIELDS are big-endian and the GPS block little-endian
+NUMPY_TYPES = {
+    ("B", ">"): "u1",
+    ("h", ">"): ">i2",
+    ("H", ">"): ">u2",
+    ("B", "<"): "u1",
+    ("d", "<"): "<f8",
+    ("c", "<"): "S1",
+}
+
+FRAME_TYPE_OFFSET = 2  # 0xFF for telemetry, image sequence number otherwise
+
+
+def frame_dtype(frame_length=FRAME_LENGTH):
+    # Structured dtype over a whole frame, every schema field becomes a named column
+    names = ["Frame Type"]
+    formats = ["u1"]
+    offsets = [FRAME_TYPE_OFFSET]
+    layouts = [(TELEMETRY_FIELDS, ">")]
+    if frame_length >= GPS_MIN_LENGTH:
+        layouts.append((GPS_FIELDS, "<"))
+    for fields, byte_order in layouts:
+        for field in fields:
+            names.append(field.name)
+            formats.append(NUMPY_TYPES[(field.type, byte_order)])
+            offsets.append(field.offset)
+    return np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": frame_length})
+
+def as_frame_array(frames, frame_length=FRAME_LENGTH):
+    if isinstance(frames, np.ndarray):
+        frames = np.ascontiguousarray(frames, dtype=np.uint8)
+    else:
+        frames = np.frombuffer(frames, dtype=np.uint8)
+    if frames.size % frame_length:
+        raise ValueError(f"{frames.size} bytes is not a whole number of {frame_length} byte frames")
+    return frames.reshape(-1, frame_length)
+
+def decode_batch(frames, frame_length=FRAME_LENGTH):
+    # frames is an N x frame_length uint8 array or a buffer of concatenated frames.
+    # Returns one masked array per field, masked where the fail sentinel was hit,
+    # plus "Frame Type" to pick out telemetry rows (== 0xFF).
+    frames = as_frame_array(frames, frame_length)
+    records = frames.reshape(-1).view(frame_dtype(frame_length))
+    columns = {"Frame Type": records["Frame Type"].copy()}
+
+    for field in TELEMETRY_FIELDS:
+        raw = records[field.name].astype(np.int32 if field.type != "B" else np.uint8)
+        mask = np.isin(raw, field.fail) if field.fail else np.zeros(len(raw), dtype=bool)
+        values = raw / field.scale if field.scale != 1 else raw
+        columns[field.name] = np.ma.masked_array(values, mask)
+
+    for group in FAIL_GROUPS:
+        group_mask = np.logical_or.reduce([np.ma.getmaskarray(columns[name]) for name in group])
+        for name in group:
+            columns[name] = np.ma.masked_array(columns[name].data, group_mask)
+
+    if frame_length < GPS_MIN_LENGTH:
+        return columns
+    for field in GPS_FIELDS:
+        values = records[field.name]
+        columns[field.name] = np.ma.masked_array(values.astype(values.dtype.newbyteorder("=")))
+    # Like decode_gps, both coordinates are masked when either is NaN/inf (no fix)
+    no_fix = ~(np.isfinite(columns["Lat"].data) & np.isfinite(columns["Lon"].data))
+    for name, direction, negative in (("Latitude", "Lat", b'S'), ("Longitude", "Lon", b'W')):
+        raw = columns[direction].data
+        with np.errstate(invalid="ignore", over="ignore"):  # garbage coordinates before a fix
+            degrees = np.trunc(raw / 100)
+            value = degrees + (raw - degrees * 100) / 60
+        columns[name] = np.ma.masked_array(np.where(columns[direction + " Dir"].data == negative, -value, value), no_fix)
+    return columns
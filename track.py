@@ -0,0 +1,129 @@
+import math
+from array import array
+
+EARTH_RADIUS = 6371000.0  # metres
+
+
+class TrackStore:
+    # Fixed capacity ring buffer of GPS fixes in flat double arrays, the oldest
+    # fixes are overwritten once it is full
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.latitudes = array("d", bytes(8 * capacity))
+        self.longitudes = array("d", bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, latitude, longitude):
+        index = (self.start + self.count) % self.capacity
+        self.times[index] = timestamp
+        self.latitudes[index] = latitude
+        self.longitudes[index] = longitude
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def ordered(self, values):
+        end = self.start + self.count
+        if end <= self.capacity:
+            return values[self.start:end]
+        return values[self.start:] + values[:end - self.capacity]
+
+    def points(self):
+        # [(latitude, longitude)], oldest first
+        return list(zip(self.ordered(self.latitudes), self.ordered(self.longitudes)))
+
+    def fixes(self):
+        # [(timestamp, latitude, longitude)], oldest first
+        return list(zip(self.ordered(self.times), self.ordered(self.latitudes), self.ordered(self.longitudes)))
+
+
+def douglas_peucker(xs, ys, tolerance):
+    # Indices of the points kept so that no dropped point is further than
+    # tolerance from the simplified line. Iterative, long tracks would hit the
+    # recursion limit.
+    if len(xs) < 3:
+        return list(range(len(xs)))
+    keep = [False] * len(xs)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(xs) - 1)]
+    while stack:
+        first, last = stack.pop()
+        x0, y0 = xs[first], ys[first]
+        dx, dy = xs[last] - x0, ys[last] - y0
+        length = math.hypot(dx, dy)
+        max_distance = -1.0
+        index = first
+        for i in range(first + 1, last):
+            if length:
+                distance = abs(dy * (xs[i] - x0) - dx * (ys[i] - y0)) / length
+            else:
+                distance = math.hypot(xs[i] - x0, ys[i] - y0)
+            if distance > max_distance:
+                max_distance = distance
+                index = i
+        if max_distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [i for i, kept in enumerate(keep) if kept]
+
+def simplify_track(points, tolerance):
+    # points is [(latitude, longitude)], tolerance in metres
+    if len(points) < 3:
+        return list(points)
+    # Equirectangular projection around the first point, plenty for a flight area
+    latitude0 = math.radians(points[0][0])
+    scale_x = EARTH_RADIUS * math.cos(latitude0) * math.pi / 180
+    scale_y = EARTH_RADIUS * math.pi / 180
+    xs = [longitude * scale_x for latitude, longitude in points]
+    ys = [latitude * scale_y for latitude, longitude in points]
+    return [points[i] for i in douglas_peucker(xs, ys, tolerance)]
+
+
+class TrackDecimator:
+    # Display side of the track: new fixes collect in a raw tail that is folded
+    # into the simplified line every tail_limit fixes, so simplification only
+    # ever looks at a few hundred points. If the line grows past max_points it
+    # is simplified again with twice the tolerance.
+    def __init__(self, tolerance=2.0, tail_limit=500, max_points=5000):
+        self.base_tolerance = tolerance
+        self.tolerance = tolerance
+        self.tail_limit = tail_limit
+        self.max_points = max_points
+        self.line = []
+        self.tail = []
+
+    def __len__(self):
+        return len(self.line) + len(self.tail)
+
+    def add(self, latitude, longitude):
+        # Returns True when the displayed line changed shape and has to be redrawn
+        self.tail.append((latitude, longitude))
+        if len(self.tail) < self.tail_limit:
+            return False
+        # The last line point anchors the tail so the join is simplified too
+        anchor = self.line[-1:]
+        self.line[-1:] = simplify_track(anchor + self.tail, self.tolerance)
+        self.tail = []
+        while len(self.line) > self.max_points:
+            self.tolerance *= 2
+            self.line = simplify_track(self.line, self.tolerance)
+        return True
+
+    def points(self):
+        return self.line + self.tail
+
+    def clear(self):
+        self.line = []
+        self.tail = []
+        self.tolerance = self.base_tolerance